@@ -0,0 +1,284 @@
+"""Result caches for ATS engine calls.
+
+Parsing and LLM results are treated as pure functions of their inputs, so they
+are keyed by a SHA-256 of those inputs and reused while the entry is fresh.
+A ResponseCache can write through to a SQLiteStore so expensive results
+survive server restarts. SemanticCache additionally matches near-duplicate
+job descriptions by the cosine similarity of their embeddings.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+CACHE_DB_FILE = os.path.join("careerhub_data", "ats_cache.sqlite3")
+CACHE_DB_TTL_SECONDS = 30 * 24 * 3600
+# Text values at least this long are zlib-compressed in stores created with compress_text=True.
+COMPRESS_MIN_CHARS = 2048
+
+# Keyed by (pid, path): SQLite connections must not be shared with forked workers.
+_connections: Dict[tuple, sqlite3.Connection] = {}
+_connections_lock = threading.Lock()
+
+
+def content_hash(*parts) -> str:
+    """Return a SHA-256 hex digest over one or more str/bytes parts."""
+    digest = hashlib.sha256()
+    for index, part in enumerate(parts):
+        if index:
+            digest.update(b"\0")
+        digest.update(part.encode("utf-8") if isinstance(part, str) else part)
+    return digest.hexdigest()
+
+
+def quantize_embedding(vector: Sequence[float]) -> tuple:
+    """
+    Return (int8 codes, scale) for a float vector.
+
+    Symmetric per-vector quantization keeps cosine rankings effectively
+    unchanged while cutting the cached footprint to one byte per dimension.
+    """
+    values = np.asarray(vector, dtype=np.float32)
+    peak = float(np.max(np.abs(values))) if values.size else 0.0
+    scale = peak / 127.0 if peak else 1.0
+    codes = np.clip(np.round(values / scale), -127, 127).astype(np.int8)
+    return codes, scale
+
+
+def dequantize_embedding(quantized: tuple) -> np.ndarray:
+    """Inverse of quantize_embedding, as a float32 vector."""
+    codes, scale = quantized
+    return codes.astype(np.float32) * np.float32(scale)
+
+
+def pack_embedding(vector: Sequence[float]) -> bytes:
+    """Quantize a vector and serialise it as a float32 scale followed by int8 codes."""
+    codes, scale = quantize_embedding(vector)
+    return np.float32(scale).tobytes() + codes.tobytes()
+
+
+def unpack_embedding(blob: bytes) -> np.ndarray:
+    """Inverse of pack_embedding, as a float32 vector."""
+    scale = float(np.frombuffer(blob[:4], dtype=np.float32)[0])
+    return dequantize_embedding((np.frombuffer(blob[4:], dtype=np.int8), scale))
+
+
+def _connection(path: str) -> sqlite3.Connection:
+    """Return the shared connection for path, opening it in WAL mode on first use."""
+    key = (os.getpid(), path)
+    with _connections_lock:
+        connection = _connections.get(key)
+        if connection is None:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            _connections[key] = connection
+        return connection
+
+
+class SQLiteStore:
+    """
+    Durable key/value table that backs a ResponseCache across restarts.
+
+    With compress_text=True the table must hold only text values; long ones
+    are stored as zlib-compressed blobs, which shrinks resume prose several
+    times over, and are decoded back to str on read.
+    """
+
+    def __init__(self, table: str, ttl_seconds: Optional[float] = CACHE_DB_TTL_SECONDS, compress_text: bool = False):
+        if not re.fullmatch(r"[A-Za-z_]\w*", table):
+            raise ValueError(f"Invalid cache table name: {table}")
+        self.table = table
+        self.ttl_seconds = ttl_seconds
+        self.compress_text = compress_text
+        self._ready_paths = set()
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        # Resolved per call so tests and deployments can repoint CACHE_DB_FILE.
+        path = CACHE_DB_FILE
+        connection = _connection(path)
+        if (os.getpid(), path) not in self._ready_paths:
+            connection.execute(f"CREATE TABLE IF NOT EXISTS {self.table} (key TEXT PRIMARY KEY, value BLOB, ts INTEGER)")
+            if self.ttl_seconds is not None:
+                connection.execute(f"DELETE FROM {self.table} WHERE ts < ?", (int(time.time() - self.ttl_seconds),))
+            self._ready_paths.add((os.getpid(), path))
+        return connection
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            row = self._db().execute(f"SELECT value, ts FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        if row is None or (self.ttl_seconds is not None and time.time() - row[1] > self.ttl_seconds):
+            return None
+        if self.compress_text and isinstance(row[0], bytes):
+            return zlib.decompress(row[0]).decode("utf-8")
+        return row[0]
+
+    def set(self, key: str, value: Any) -> None:
+        if self.compress_text and isinstance(value, str) and len(value) >= COMPRESS_MIN_CHARS:
+            value = zlib.compress(value.encode("utf-8"))
+        with self._lock:
+            self._db().execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, ts) VALUES (?, ?, ?)",
+                (key, value, int(time.time())),
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db().execute(f"DELETE FROM {self.table}")
+
+
+class ResponseCache:
+    """Thread-safe LRU cache with a per-entry time-to-live and hit/miss counters."""
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: Optional[float] = 24 * 3600,
+        store: Optional[SQLiteStore] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the cached value for key, or default when missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds is not None and time.time() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+        value = self.store.get(key) if self.store is not None else None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+        self._remember(key, value)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store value under key, evicting the least recently used entries."""
+        self._remember(key, value)
+        if self.store is not None:
+            self.store.set(key, value)
+
+    def clear(self) -> None:
+        """Drop every entry, including persisted ones, and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+        if self.store is not None:
+            self.store.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class SemanticCache:
+    """
+    LRU cache matched on embedding similarity plus an exact secondary key.
+
+    A lookup hits when a stored entry has the same key_tail and its embedding
+    has cosine similarity >= threshold with the query embedding, so small
+    edits to a job description still reuse the earlier result.
+    """
+
+    def __init__(self, threshold: float = 0.92, max_entries: int = 256, ttl_seconds: Optional[float] = 3600):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        # [unit_embedding, key_tail, value, stored_at], least recently used first.
+        self._entries: List[list] = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _expire(self) -> None:
+        if self.ttl_seconds is None:
+            return
+        cutoff = time.time() - self.ttl_seconds
+        self._entries = [entry for entry in self._entries if entry[3] >= cutoff]
+
+    def get(self, embedding: Sequence[float], key_tail: str, default: Any = None) -> Any:
+        """Return the most similar fresh value stored under key_tail, or default."""
+        query = self._unit(embedding)
+        with self._lock:
+            self._expire()
+            positions = [index for index, entry in enumerate(self._entries) if entry[1] == key_tail]
+            if positions:
+                similarities = np.stack([self._entries[index][0] for index in positions]) @ query
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    entry = self._entries.pop(positions[best])
+                    self._entries.append(entry)
+                    self.hits += 1
+                    return entry[2]
+            self.misses += 1
+            return default
+
+    def set(self, embedding: Sequence[float], key_tail: str, value: Any) -> None:
+        """Store value, evicting the least recently used entries beyond max_entries."""
+        with self._lock:
+            self._entries.append([self._unit(embedding), key_tail, value, time.time()])
+            del self._entries[:max(0, len(self._entries) - self.max_entries)]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+__all__ = [
+    "CACHE_DB_FILE",
+    "COMPRESS_MIN_CHARS",
+    "ResponseCache",
+    "SQLiteStore",
+    "SemanticCache",
+    "content_hash",
+    "dequantize_embedding",
+    "pack_embedding",
+    "quantize_embedding",
+    "unpack_embedding",
+]
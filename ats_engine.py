@@ -1,14 +1,21 @@
+import atexit
 import openai
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 import io
-from pypdf import PdfReader
+import json
 import os
 import re
+import threading
 import warnings
-from typing import List, Dict, Optional
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from itertools import islice
+from typing import Iterable, Iterator, List, Dict, Optional
 from dotenv import load_dotenv
 
+from ats_cache import ResponseCache, SQLiteStore, SemanticCache, content_hash, pack_embedding, unpack_embedding
+
 # ======================================================
 # 1. LOAD ENV FILE & API KEY SETUP
 # ======================================================
@@ -21,6 +28,7 @@ class ATSConfigurationError(RuntimeError):
 
 
 _client = None
+_client_lock = threading.Lock()
 
 
 class _ServiceReporter:
@@ -59,10 +67,17 @@ def setup_openai_client():
         st.stop()
 
 def get_openai_client():
-    """Return a lazily initialized OpenAI client."""
+    """
+    Return the shared, lazily initialized OpenAI client.
+
+    Concurrent batch calls would otherwise race to build several clients, each
+    with its own HTTP connection pool, so creation is guarded by a lock.
+    """
     global _client
     if _client is None:
-        _client = setup_openai_client()
+        with _client_lock:
+            if _client is None:
+                _client = setup_openai_client()
     return _client
 
 
@@ -75,9 +90,72 @@ class _OpenAIClientProxy:
 
 client = _OpenAIClientProxy()
 
+# Results are keyed by a SHA-256 of their inputs; see ats_cache. Extracted and
+# cleaned resume text is also persisted so restarts keep the expensive work.
+_extract_cache = ResponseCache(max_entries=128, store=SQLiteStore("resume_text_cache", compress_text=True))
+_clean_cache = ResponseCache(max_entries=512, store=SQLiteStore("resume_clean_cache", compress_text=True))
+_validation_cache = ResponseCache(max_entries=512, store=SQLiteStore("resume_validation_cache"))
+# Embeddings are persisted too, keyed by model and text, as packed int8 blobs.
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_BATCH_SIZE = 2048
+EMBEDDING_MAX_TOKENS = 8191
+_embedding_cache = ResponseCache(max_entries=1024, store=SQLiteStore("embedding_cache"))
+_profile_match_cache = ResponseCache(max_entries=256)
+_cv_optimization_cache = ResponseCache(max_entries=256)
+# Generated feedback and suggestions are matched on the job description
+# embedding, so whitespace or punctuation edits to the JD still hit. Rankings
+# are never reused this way: a near-duplicate JD can still rank differently.
+_feedback_cache = SemanticCache(threshold=0.92)
+_improvement_cache = SemanticCache(threshold=0.92)
+
+
+def get_cache_stats() -> Dict[str, Dict[str, int]]:
+    """Return hit/miss counters for the engine's result caches."""
+    return {
+        "pdf_extraction": _extract_cache.stats(),
+        "resume_cleaning": _clean_cache.stats(),
+        "resume_validation": _validation_cache.stats(),
+        "embeddings": _embedding_cache.stats(),
+        "profile_match": _profile_match_cache.stats(),
+        "cv_optimization": _cv_optimization_cache.stats(),
+        "feedback": _feedback_cache.stats(),
+        "improvements": _improvement_cache.stats(),
+    }
+
 # ======================================================
 # 2. RESUME VALIDATION FUNCTION
 # ======================================================
+_VALIDATION_SYSTEM_PROMPT = """
+You are a document classifier. Determine if the provided text is a resume/CV.
+
+INSTRUCTIONS:
+1. Check for typical resume sections: EXPERIENCE, SKILLS, EDUCATION, SUMMARY, OBJECTIVE, CONTACT
+2. Check for job titles, company names, dates, educational institutions
+3. Resumes should have work history or educational background
+
+Respond with ONLY "YES" if it's a resume, or "NO" if it's not.
+"""
+
+
+# Text naming none of these sections anywhere is rejected locally only when it is
+# also shorter than RESUME_MIN_CHARS; otherwise (non-English resumes, unusual
+# headings) the LLM decides.
+_RESUME_SECTION_NAMES = r"experience|education|skills|employment|qualifications|work history|projects|summary|objective|certifications"
+_RESUME_SECTION_WORDS = re.compile(rf"\b({_RESUME_SECTION_NAMES})\b", re.IGNORECASE)
+# Job descriptions and cover letters use the same words in prose and under their
+# own headings, so only heading-shaped lines (the name alone, optional colon) in
+# the classifier's sample count towards a local accept, and a job-posting
+# heading rules it out.
+_RESUME_SECTION_HEADINGS = re.compile(rf"^[ \t]*({_RESUME_SECTION_NAMES})[ \t]*:?[ \t]*$", re.IGNORECASE | re.MULTILINE)
+_JOB_POSTING_HEADINGS = re.compile(
+    r"^[ \t]*(responsibilities|requirements|about the role|about us|benefits|what you'll do|who you are)[ \t]*:?[ \t]*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+RESUME_SECTIONS_TO_ACCEPT = 3
+RESUME_MIN_CHARS = 200
+_NOT_A_RESUME_MESSAGE = "❌ This doesn't appear to be a resume/CV. Please upload a valid resume with work experience, education, and skills."
+
+
 def validate_resume_document(raw_text: str) -> tuple[bool, str]:
     """
     Validates if the uploaded document is actually a resume/CV.
@@ -88,42 +166,46 @@ def validate_resume_document(raw_text: str) -> tuple[bool, str]:
     Returns:
         Tuple of (is_valid, error_message)
     """
-    system_prompt = """
-    You are a document classifier. Determine if the provided text is a resume/CV.
-    
-    INSTRUCTIONS:
-    1. Check for typical resume sections: EXPERIENCE, SKILLS, EDUCATION, SUMMARY, OBJECTIVE, CONTACT
-    2. Check for job titles, company names, dates, educational institutions
-    3. Resumes should have work history or educational background
-    
-    Respond with ONLY "YES" if it's a resume, or "NO" if it's not.
-    """
-    
     try:
+        if not _RESUME_SECTION_WORDS.search(raw_text) and len(raw_text.strip()) < RESUME_MIN_CHARS:
+            return False, _NOT_A_RESUME_MESSAGE
+
         # Use first 1000 chars to validate quickly
         sample_text = raw_text[:1000]
-        
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": sample_text}
-            ],
-            temperature=0.0,
-            max_tokens=10
-        )
-        
-        result = response.choices[0].message.content.strip().upper()
-        
-        if "YES" in result:
+        headings = {match.lower() for match in _RESUME_SECTION_HEADINGS.findall(sample_text)}
+        if len(headings) >= RESUME_SECTIONS_TO_ACCEPT and not _JOB_POSTING_HEADINGS.search(sample_text):
+            return True, ""
+
+        # Verdicts are stored as 1/0 so they round-trip through SQLite unchanged.
+        cache_key = content_hash(sample_text)
+        is_resume = _validation_cache.get(cache_key)
+        if is_resume is None:
+            is_resume = int(_classify_resume_sample(sample_text))
+            _validation_cache.set(cache_key, is_resume)
+
+        if is_resume:
             return True, ""
         else:
-            return False, "❌ This doesn't appear to be a resume/CV. Please upload a valid resume with work experience, education, and skills."
+            return False, _NOT_A_RESUME_MESSAGE
             
     except Exception as e:
         # If validation fails, let it through but warn user
         return True, ""
 
+
+def _classify_resume_sample(sample_text: str) -> bool:
+    response = client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": _VALIDATION_SYSTEM_PROMPT},
+            {"role": "user", "content": sample_text}
+        ],
+        temperature=0.0,
+        max_tokens=10
+    )
+    return "YES" in response.choices[0].message.content.strip().upper()
+
+
 # ======================================================
 # 3. DOCUMENT PARSING FUNCTION
 # ======================================================
@@ -147,24 +229,281 @@ def extract_text_from_pdf(uploaded_file) -> str:
         file_bytes = uploaded_file.read()
         if not file_bytes:
             raise ValueError("Uploaded file is empty")
-            
-        reader = PdfReader(io.BytesIO(file_bytes))
-        if not reader.pages:
-            raise ValueError("PDF has no pages")
-            
-        text = ""
-        for page in reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + "\n"
-                
-        return text.strip()
+
+        cache_key = content_hash(file_bytes)
+        cached_text = _extract_cache.get(cache_key)
+        if cached_text is not None:
+            return cached_text
+
+        text = _parse_pdf_bytes(file_bytes)
+        _extract_cache.set(cache_key, text)
+        return text
     except Exception as e:
         raise ValueError(f"Error extracting PDF text: {str(e)}")
 
+
+@lru_cache(maxsize=1)
+def _pymupdf():
+    """Return the optional PyMuPDF module, or None when it is not installed."""
+    try:
+        import pymupdf
+    except ImportError:
+        return None
+    return pymupdf
+
+
+def _parse_pdf_bytes(file_bytes: bytes) -> str:
+    """Parse PDF bytes into text without touching the extraction cache."""
+    # PyMuPDF's C parser is several times faster than pypdf; use it when present.
+    pymupdf = _pymupdf()
+    if pymupdf is not None:
+        with pymupdf.open(stream=file_bytes, filetype="pdf") as document:
+            if not document.page_count:
+                raise ValueError("PDF has no pages")
+            return _join_page_texts(page.get_text() for page in document)
+
+    # Deferred so routes that never read a PDF do not import pypdf.
+    from pypdf import PdfReader
+
+    # BytesIO shares the bytes object until written to, so this is not a copy.
+    reader = PdfReader(io.BytesIO(file_bytes))
+    if not reader.pages:
+        raise ValueError("PDF has no pages")
+    text = _join_page_texts(page.extract_text(extraction_mode="plain") for page in reader.pages)
+    if len(text) >= PDF_LAYOUT_FALLBACK_CHARS:
+        return text
+    # Layout mode is much slower but recovers text from some oddly positioned PDFs.
+    layout_text = _join_page_texts(page.extract_text(extraction_mode="layout") for page in reader.pages)
+    return layout_text if _visible_length(layout_text) > _visible_length(text) else text
+
+
+# Far beyond what embeddings or the LLM prompts use; later pages are not parsed.
+PDF_TEXT_CHAR_LIMIT = 200_000
+# Plain extraction shorter than this is retried in pypdf's layout mode.
+PDF_LAYOUT_FALLBACK_CHARS = 200
+
+
+def _visible_length(text: str) -> int:
+    return len(text) - sum(map(text.count, " \n\t"))
+
+
+def _join_page_texts(page_texts: Iterable[Optional[str]]) -> str:
+    """Join non-empty page texts, stopping once PDF_TEXT_CHAR_LIMIT is reached."""
+    parts = []
+    total = 0
+    for page_text in page_texts:
+        if page_text:
+            parts.append(page_text)
+            total += len(page_text)
+            if total >= PDF_TEXT_CHAR_LIMIT:
+                break
+    return "\n".join(parts).strip()
+
+
+PDF_EXTRACT_WORKERS = min(os.cpu_count() or 1, 4)
+PDF_EXTRACT_IN_FLIGHT = PDF_EXTRACT_WORKERS * 2
+
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+_pdf_pool_lock = threading.Lock()
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    """
+    Return the process pool shared by every extraction batch.
+
+    Starting worker processes costs far more than parsing a resume, so the
+    pool is created on first use and kept for the life of the server.
+    """
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            _pdf_pool = ProcessPoolExecutor(max_workers=PDF_EXTRACT_WORKERS)
+            atexit.register(_pdf_pool.shutdown, cancel_futures=True)
+        return _pdf_pool
+
+
+def _discard_pdf_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next batch starts a fresh one."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is pool:
+            _pdf_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _extract_one(name: str, blob: bytes) -> Dict[str, str]:
+    """Worker for extract_texts_from_pdfs; must stay module-level to be picklable."""
+    if not blob:
+        return {"filename": name, "error": "Error extracting PDF text: Uploaded file is empty"}
+    try:
+        return {"filename": name, "text": _parse_pdf_bytes(blob)}
+    except Exception as e:
+        return {"filename": name, "error": f"Error extracting PDF text: {str(e)}"}
+
+
+def extract_texts_from_pdfs(files: Iterable[tuple[str, bytes]]) -> List[Dict[str, str]]:
+    """
+    Extract text from several PDFs in parallel worker processes.
+
+    PDF parsing is CPU-bound and independent per file, so documents are
+    parsed on a shared pool of worker processes rather than sequentially.
+    The input is consumed lazily and at most PDF_EXTRACT_IN_FLIGHT files are
+    held for the workers at once, so peak memory does not grow with the
+    batch size. A batch with a single file to parse is handled in-process
+    without touching the pool.
+
+    Args:
+        files: Iterable of (filename, pdf_bytes) tuples
+
+    Returns:
+        List of dicts in input order, each with 'filename' and either
+        'text' or 'error'
+    """
+    results: List[Optional[Dict[str, str]]] = []
+    in_flight = {}
+    # cache_key -> [(index, filename)] for copies of a file already being parsed.
+    duplicates: Dict[str, list] = {}
+    executor = None
+    held = None
+    completed = False
+
+    def record(index, cache_key, result):
+        results[index] = result
+        for duplicate_index, duplicate_name in duplicates.pop(cache_key, []):
+            results[duplicate_index] = {**result, "filename": duplicate_name}
+        if "text" in result:
+            _extract_cache.set(cache_key, result["text"])
+
+    def collect(future):
+        record(*in_flight.pop(future), future.result())
+
+    def submit(index, cache_key, name, blob):
+        if len(in_flight) >= PDF_EXTRACT_IN_FLIGHT:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                collect(future)
+        in_flight[executor.submit(_extract_one, name, blob)] = (index, cache_key)
+
+    try:
+        for index, (name, blob) in enumerate(files):
+            # Workers never touch the caches, so hits and stores for the
+            # batch (including the SQLite write-through) happen here.
+            cache_key = content_hash(blob)
+            cached_text = _extract_cache.get(cache_key)
+            results.append({"filename": name, "text": cached_text} if cached_text is not None else None)
+            if cached_text is not None:
+                continue
+            if cache_key in duplicates:
+                # The same PDF is already in flight; reuse its result.
+                duplicates[cache_key].append((index, name))
+                continue
+            duplicates[cache_key] = []
+
+            if held is None and executor is None:
+                # Hold the first file back: a batch of one is parsed inline.
+                held = (index, cache_key, name, blob)
+                continue
+            if executor is None:
+                executor = _get_pdf_pool()
+                submit(*held)
+            submit(index, cache_key, name, blob)
+
+        if executor is None and held is not None:
+            # Starting (or talking to) worker processes costs more than one parse.
+            record(*held[:2], _extract_one(*held[2:]))
+
+        for future in as_completed(list(in_flight)):
+            collect(future)
+        completed = True
+    except BrokenProcessPool:
+        _discard_pdf_pool(executor)
+        raise
+    finally:
+        if not completed:
+            # Leave the shared pool running but drop this batch's queued work.
+            for future in in_flight:
+                future.cancel()
+    return results
+
 # ======================================================
 # 4. AI CLEANING & STRUCTURING FUNCTION
 # ======================================================
+_CLEANING_SYSTEM_PROMPT = """
+You are an expert Document Processor. Your task is to clean up raw, noisy text extracted from a resume.
+
+INSTRUCTIONS:
+1. Remove all noise: page numbers, headers, footers, repetitive lines, and obvious contact information (phone numbers, email addresses, URLs).
+2. Structure the remaining core content using the following tags only: [SUMMARY], [SKILLS], [EXPERIENCE], [EDUCATION].
+3. Return only the cleaned and tagged text. DO NOT add any extra commentary or introductory phrases.
+"""
+_SECTION_TAG_LINE = re.compile(r"^\s*\[(SUMMARY|SKILLS|EXPERIENCE|EDUCATION)\]", re.MULTILINE)
+
+
+def _is_already_structured(text: str) -> bool:
+    """True when text already carries at least two of the cleaning section tags."""
+    return len(set(_SECTION_TAG_LINE.findall(text))) >= 2
+
+
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+_URL = re.compile(r"https?://\S+|www\.\S+", re.IGNORECASE)
+# A phone number starts with a "+" country code or a 0-prefixed trunk code and
+# continues in digit groups split by single spaces or hyphens; periods and
+# number runs that start elsewhere (dates, GPAs, standards) never match.
+_PHONE_CANDIDATE = re.compile(r"(?<![\w+.])(?:\+\d{1,3}|\(0\d{1,4}\)|0\d{1,4})(?:[ \t-]?\d{2,4}){2,4}(?![\w.])")
+_YEAR = re.compile(r"(?<!\d)(?:19|20)\d{2}(?!\d)")
+_PAGE_NUMBER_LINE = re.compile(r"^[ \t]*Page[ \t]+\d+([ \t]+of[ \t]+\d+)?[ \t]*$", re.IGNORECASE | re.MULTILINE)
+_EXTRA_BLANK_LINES = re.compile(r"\n[ \t]*(?:\n[ \t]*)+\n")
+
+
+def _drop_phone(match: "re.Match[str]") -> str:
+    # Short runs and year pairs such as "0 2019 2024" are left in place.
+    number = match.group(0)
+    if sum(char.isdigit() for char in number) < 9 or len(_YEAR.findall(number)) >= 2:
+        return number
+    return ""
+
+
+def _strip_resume_noise(text: str) -> str:
+    """Remove emails, URLs, phone numbers and page-number lines deterministically."""
+    text = _URL.sub("", _EMAIL.sub("", text))
+    text = _PAGE_NUMBER_LINE.sub("", _PHONE_CANDIDATE.sub(_drop_phone, text))
+    return _EXTRA_BLANK_LINES.sub("\n\n", text).strip()
+
+
+HEURISTIC_CLEAN_MAX_CHARS = 3000
+_HEADING_TAGS = {
+    "summary": "SUMMARY", "professional summary": "SUMMARY", "profile": "SUMMARY",
+    "experience": "EXPERIENCE", "work experience": "EXPERIENCE",
+    "professional experience": "EXPERIENCE", "employment": "EXPERIENCE",
+    "education": "EDUCATION",
+    "skills": "SKILLS", "key skills": "SKILLS", "technical skills": "SKILLS",
+}
+_HEADING_LINE = re.compile(
+    r"^[ \t]*(" + "|".join(sorted(map(re.escape, _HEADING_TAGS), key=len, reverse=True)) + r")[ \t]*:?[ \t]*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+
+def _heuristic_structure(text: str) -> Optional[str]:
+    """
+    Tag a short resume locally when it already has all four plain headings.
+
+    Everything before the first heading (the name and contact block) is
+    dropped. Returns None when the text is too long or a heading is
+    missing, in which case the LLM does the cleaning.
+    """
+    if len(text) > HEURISTIC_CLEAN_MAX_CHARS:
+        return None
+    headings = list(_HEADING_LINE.finditer(text))
+    if {_HEADING_TAGS[match.group(1).lower()] for match in headings} != {"SUMMARY", "SKILLS", "EXPERIENCE", "EDUCATION"}:
+        return None
+    sections = []
+    for match, following in zip(headings, headings[1:] + [None]):
+        body = text[match.end():following.start() if following else len(text)].strip()
+        sections.append(f"[{_HEADING_TAGS[match.group(1).lower()]}]\n{body}")
+    return "\n\n".join(sections)
+
+
 def clean_and_structure_resume(raw_resume_text: str) -> str:
     """
     Uses LLM to clean noise and apply section tags to text.
@@ -177,22 +516,32 @@ def clean_and_structure_resume(raw_resume_text: str) -> str:
     """
     if not raw_resume_text or not raw_resume_text.strip():
         return "Error: Empty resume text provided"
-    
-    system_prompt = """
-    You are an expert Document Processor. Your task is to clean up raw, noisy text extracted from a resume.
 
-    INSTRUCTIONS:
-    1. Remove all noise: page numbers, headers, footers, repetitive lines, and obvious contact information (phone numbers, email addresses, URLs).
-    2. Structure the remaining core content using the following tags only: [SUMMARY], [SKILLS], [EXPERIENCE], [EDUCATION].
-    3. Return only the cleaned and tagged text. DO NOT add any extra commentary or introductory phrases.
-    """
+    # Re-cleaning tagged output (e.g. a reviewed resume sent back in) would be a wasted call.
+    if _is_already_structured(raw_resume_text):
+        return raw_resume_text
+    # Contact details and page numbers are stripped locally, so the model
+    # receives (and is billed for) only the content it has to structure.
+    resume_text = _strip_resume_noise(raw_resume_text)
+    if not resume_text:
+        return "Error: Empty resume text provided"
+    # Short resumes with plain headings are tagged without an LLM round trip.
+    structured = _heuristic_structure(resume_text)
+    if structured is not None:
+        return structured
+
+    # Cleaning runs at temperature 0, so identical text can reuse the result.
+    cache_key = content_hash(raw_resume_text)
+    cached_text = _clean_cache.get(cache_key)
+    if cached_text is not None:
+        return cached_text
 
     try:
         response = client.chat.completions.create(
             model="gpt-4o-mini",
             messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": raw_resume_text}
+                {"role": "system", "content": _CLEANING_SYSTEM_PROMPT},
+                {"role": "user", "content": resume_text}
             ],
             temperature=0.0,
             max_tokens=2000
@@ -201,7 +550,8 @@ def clean_and_structure_resume(raw_resume_text: str) -> str:
         
         if not cleaned_text:
             return "Error: No content returned from cleaning"
-            
+
+        _clean_cache.set(cache_key, cleaned_text)
         return cleaned_text
         
     except openai.APIError as e:
@@ -210,28 +560,85 @@ def clean_and_structure_resume(raw_resume_text: str) -> str:
         return f"Unexpected error during cleaning: {str(e)}"
 
 
+def _positive_int_setting(name: str, default: int) -> int:
+    """Read a positive integer from the environment, warning and falling back on bad values."""
+    value = os.getenv(name, "").strip()
+    if not value:
+        return default
+    try:
+        return max(1, int(value))
+    except ValueError:
+        st.warning(f"Ignoring invalid {name}={value!r}; using {default}")
+        return default
+
+
+# Shared across requests so concurrent batches stay under the provider rate limit.
+# Raise ATS_LLM_CONCURRENCY on accounts with a higher requests-per-minute tier.
+LLM_CONCURRENCY = _positive_int_setting("ATS_LLM_CONCURRENCY", 8)
+LLM_MAX_WORKERS = max(16, LLM_CONCURRENCY)
+_llm_slots = threading.BoundedSemaphore(LLM_CONCURRENCY)
+
+
+def _with_llm_slot(function, *args):
+    with _llm_slots:
+        return function(*args)
+
+
+def _clean_with_slot(raw_resume_text: str) -> str:
+    return _with_llm_slot(clean_and_structure_resume, raw_resume_text)
+
+
+def clean_resumes(raw_resume_texts: List[str]) -> List[str]:
+    """
+    Clean several resumes concurrently.
+
+    Cleaning calls are network-bound, so they are fanned out over a thread
+    pool instead of being issued one after another.
+
+    Args:
+        raw_resume_texts: Raw texts extracted from resume PDFs
+
+    Returns:
+        Cleaned texts (or error strings) in input order
+    """
+    if not raw_resume_texts:
+        return []
+
+    # The same resume is often uploaded twice; clean each distinct text once.
+    unique_texts = list(dict.fromkeys(raw_resume_texts))
+    with ThreadPoolExecutor(max_workers=min(LLM_MAX_WORKERS, len(unique_texts))) as executor:
+        cleaned = dict(zip(unique_texts, executor.map(_clean_with_slot, unique_texts)))
+    return [cleaned[text] for text in raw_resume_texts]
+
+
+_SECTION_HEADINGS = frozenset({
+    "summary", "profile", "experience", "professional experience",
+    "work experience", "employment", "education", "skills",
+    "projects", "certifications", "contact", "objective", "resume", "cv"
+})
+_WHITESPACE_RUN = re.compile(r"\s+")
+_NON_NAME_CHARS = re.compile(r"[^A-Za-z'’-]")
+
+
 def extract_candidate_name(raw_resume_text: str) -> Optional[str]:
     """
     Try to infer the candidate's name from the top of the raw resume text.
 
     Falls back to None when a confident name is not found.
     """
-    if not raw_resume_text or not raw_resume_text.strip():
+    if not raw_resume_text:
         return None
 
-    section_headings = {
-        "summary", "profile", "experience", "professional experience",
-        "work experience", "employment", "education", "skills",
-        "projects", "certifications", "contact", "objective", "resume", "cv"
-    }
-
-    lines = [line.strip() for line in raw_resume_text.splitlines() if line.strip()]
+    # Only the first ten non-blank lines are candidates, so strip each line
+    # once and stop reading the resume as soon as they are collected.
+    stripped_lines = (line.strip() for line in raw_resume_text.splitlines())
+    lines = islice((line for line in stripped_lines if line), 10)
 
-    for line in lines[:10]:
-        normalized = re.sub(r"\s+", " ", line).strip(" |,-")
+    for line in lines:
+        normalized = _WHITESPACE_RUN.sub(" ", line).strip(" |,-")
         lowered = normalized.lower()
 
-        if lowered in section_headings:
+        if lowered in _SECTION_HEADINGS:
             continue
         if "@" in normalized or "http" in lowered or "www." in lowered:
             continue
@@ -245,7 +652,7 @@ def extract_candidate_name(raw_resume_text: str) -> Optional[str]:
         cleaned_words = []
         valid = True
         for word in words:
-            token = re.sub(r"[^A-Za-z'’-]", "", word)
+            token = _NON_NAME_CHARS.sub("", word)
             if not token or len(token) < 2:
                 valid = False
                 break
@@ -261,6 +668,112 @@ def extract_candidate_name(raw_resume_text: str) -> Optional[str]:
 # ======================================================
 # 5. EMBEDDING & RANKING ENGINE FUNCTIONS
 # ======================================================
+@lru_cache(maxsize=1)
+def _embedding_encoding():
+    """Return the optional tiktoken encoding for EMBEDDING_MODEL, or None."""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def _normalize_embedding_text(text: Optional[str]) -> str:
+    """Collapse whitespace once; the result is both the cache key input and the text sent."""
+    return " ".join(text.split()) if text else ""
+
+
+def _prepare_embedding_input(text: str) -> str:
+    # A token spans at least one UTF-8 byte, so text this short can never be
+    # over the limit; ranking chunks and most JDs skip tokenisation entirely.
+    if len(text) * 4 <= EMBEDDING_MAX_TOKENS:
+        return text
+    encoding = _embedding_encoding()
+    if encoding is None:
+        # Truncate to avoid token limits (max ~8000 tokens for embeddings)
+        return text[:8000]
+    # With a tokenizer, cut at the model's real limit instead of a character guess.
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= EMBEDDING_MAX_TOKENS:
+        return text
+    return encoding.decode(tokens[:EMBEDDING_MAX_TOKENS])
+
+
+def _embedding_key(normalized_text: str) -> str:
+    """Cache key for normalized text; whitespace-only edits (re-pasted JDs, re-extracted PDFs) share it."""
+    return content_hash(EMBEDDING_MODEL, normalized_text)
+
+
+def _unit_embedding(packed: bytes) -> List[float]:
+    """Dequantize a cached vector and rescale it to unit length."""
+    vector = unpack_embedding(packed)
+    norm = np.linalg.norm(vector)
+    return (vector / norm if norm else vector).tolist()
+
+
+def get_embeddings(texts: List[str]) -> List[Optional[List[float]]]:
+    """
+    Converts several texts into numeric vectors with a single API request.
+
+    Cached vectors are reused and only the remaining texts are sent, so a
+    batch of resumes costs one round trip instead of one per resume.
+
+    Args:
+        texts: Texts to embed
+
+    Returns:
+        One unit-length embedding per input, in input order; None for empty
+        text or when the request fails
+    """
+    vectors: List[Optional[List[float]]] = [None] * len(texts)
+    # cache_key -> (input positions, prepared text); duplicates are sent once.
+    pending: Dict[str, tuple] = {}
+    for index, text in enumerate(texts):
+        text = _normalize_embedding_text(text)
+        if not text:
+            continue
+        # Resumes and JDs are re-ranked repeatedly; reuse vectors for identical text.
+        cache_key = _embedding_key(text)
+        if cache_key in pending:
+            pending[cache_key][0].append(index)
+            continue
+        cached_vector = _embedding_cache.get(cache_key)
+        if cached_vector is not None:
+            vectors[index] = _unit_embedding(cached_vector)
+        else:
+            pending[cache_key] = ([index], _prepare_embedding_input(text))
+
+    if not pending:
+        return vectors
+
+    pending_keys = list(pending)
+    try:
+        # One request per EMBEDDING_BATCH_SIZE inputs, the API's per-request cap.
+        for start in range(0, len(pending_keys), EMBEDDING_BATCH_SIZE):
+            batch_keys = pending_keys[start:start + EMBEDDING_BATCH_SIZE]
+            response = client.embeddings.create(
+                input=[pending[cache_key][1] for cache_key in batch_keys],
+                model=EMBEDDING_MODEL
+            )
+
+            # The API reports each vector's position in the request batch.
+            for position, item in enumerate(response.data or []):
+                cache_key = batch_keys[getattr(item, "index", position)]
+                # Cached as int8 and always returned dequantized, so a text maps to
+                # the same vector whether or not it was already cached.
+                packed = pack_embedding(item.embedding)
+                _embedding_cache.set(cache_key, packed)
+                vector = _unit_embedding(packed)
+                for index in pending[cache_key][0]:
+                    vectors[index] = list(vector)
+
+    except openai.APIError as e:
+        st.warning(f"Embedding API error: {str(e)}")
+    except Exception as e:
+        st.warning(f"Error generating embedding: {str(e)}")
+    return vectors
+
+
 def get_embedding(text: str) -> Optional[List[float]]:
     """
     Converts text into a numeric vector for ranking.
@@ -271,30 +784,109 @@ def get_embedding(text: str) -> Optional[List[float]]:
     Returns:
         Embedding vector or None if error occurs
     """
-    if not text or not text.strip():
-        return None
-        
-    try:
-        text = text.replace("\n", " ").strip()
-        # Truncate to avoid token limits (max ~8000 tokens for embeddings)
-        text = text[:8000]
-        
-        response = client.embeddings.create(
-            input=[text], 
-            model="text-embedding-3-small"
-        )
-        
-        if not response.data:
-            return None
-            
-        return response.data[0].embedding
-        
-    except openai.APIError as e:
-        st.warning(f"Embedding API error: {str(e)}")
-        return None
-    except Exception as e:
-        st.warning(f"Error generating embedding: {str(e)}")
-        return None
+    return get_embeddings([text])[0]
+
+
+def submit_embedding_batch(texts: List[str]) -> Dict[str, object]:
+    """
+    Queue embeddings for uncached texts on the OpenAI Batch API.
+
+    Batch jobs are billed at half price and draw on a separate rate-limit
+    pool, which suits pools of hundreds of resumes that can wait. Once
+    collect_embedding_batch has stored the results, ranking the same texts
+    needs no synchronous embedding requests.
+
+    Returns:
+        Dict with 'batch_id' (None when everything is cached), 'status' and
+        the number of 'submitted' texts
+    """
+    lines = {}
+    for text in texts:
+        text = _normalize_embedding_text(text)
+        if not text:
+            continue
+        cache_key = _embedding_key(text)
+        if cache_key not in lines and _embedding_cache.get(cache_key) is None:
+            # custom_id carries the cache key so results can be stored on collection.
+            lines[cache_key] = json.dumps({
+                "custom_id": cache_key,
+                "method": "POST",
+                "url": "/v1/embeddings",
+                "body": {"model": EMBEDDING_MODEL, "input": _prepare_embedding_input(text)},
+            })
+    if not lines:
+        return {"batch_id": None, "status": "completed", "submitted": 0}
+
+    batch_file = client.files.create(
+        file=("embeddings.jsonl", "\n".join(lines.values()).encode("utf-8")),
+        purpose="batch"
+    )
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/embeddings",
+        completion_window="24h"
+    )
+    return {"batch_id": batch.id, "status": batch.status, "submitted": len(lines)}
+
+
+def collect_embedding_batch(batch_id: str) -> Dict[str, object]:
+    """
+    Check a submit_embedding_batch job and cache its vectors once it completes.
+
+    Returns:
+        Dict with the batch 'status' and the number of vectors 'stored'
+    """
+    batch = client.batches.retrieve(batch_id)
+    if batch.status != "completed" or not batch.output_file_id:
+        return {"batch_id": batch_id, "status": batch.status, "stored": 0}
+
+    stored = 0
+    for line in client.files.content(batch.output_file_id).text.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        response = record.get("response") or {}
+        data = (response.get("body") or {}).get("data") or []
+        if response.get("status_code") == 200 and data:
+            _embedding_cache.set(record["custom_id"], pack_embedding(data[0]["embedding"]))
+            stored += 1
+    return {"batch_id": batch_id, "status": batch.status, "stored": stored}
+
+
+def cosine_score(first: List[float], second: List[float]) -> float:
+    """
+    Cosine similarity of two embeddings, computed as one float32 dot product.
+
+    Vectors from get_embedding(s) are already unit length, but callers may
+    pass their own, so both are still normalised; zero vectors score 0.
+    """
+    a = np.asarray(first, dtype=np.float32)
+    b = np.asarray(second, dtype=np.float32)
+    norms = float(np.linalg.norm(a) * np.linalg.norm(b))
+    return float(np.dot(a, b)) / norms if norms else 0.0
+
+
+# When any resume in a pool is longer than this (about 2.5K tokens), every
+# resume in the pool is embedded as overlapping windows, so section-local
+# evidence is not averaged away and all candidates share one score scale.
+RESUME_CHUNKING_MIN_CHARS = 10_000
+RESUME_CHUNK_CHARS = 2000
+RESUME_CHUNK_STRIDE = 1600
+RESUME_CHUNK_TOP_K = 3
+
+
+def _resume_windows(resume: str) -> List[str]:
+    if len(resume) <= RESUME_CHUNK_CHARS:
+        return [resume]
+    return [resume[start:start + RESUME_CHUNK_CHARS] for start in range(0, len(resume) - RESUME_CHUNK_CHARS + RESUME_CHUNK_STRIDE, RESUME_CHUNK_STRIDE)]
+
+
+def resume_embedding_chunks(resumes: List[str]) -> List[List[str]]:
+    """The texts rank_candidates embeds for each resume of a pool: itself, or its overlapping windows."""
+    if not any(len(resume) > RESUME_CHUNKING_MIN_CHARS for resume in resumes):
+        return [[resume] for resume in resumes]
+    return [_resume_windows(resume) for resume in resumes]
+
 
 def rank_candidates(
     job_description: str, 
@@ -318,38 +910,59 @@ def rank_candidates(
         st.error("Invalid candidates data")
         return []
     
+    valid_candidates = []
+    for candidate in candidates_data:
+        # Validate candidate data structure
+        if not isinstance(candidate, dict) or 'resume' not in candidate or 'name' not in candidate:
+            st.warning(f"Skipping invalid candidate record: {candidate}")
+            continue
+        valid_candidates.append(candidate)
+
     try:
-        jd_vector = get_embedding(job_description)
+        # The JD and every resume chunk share one embeddings request.
+        chunks = resume_embedding_chunks([candidate['resume'] for candidate in valid_candidates])
+        vectors = get_embeddings([job_description] + [chunk for resume_chunks in chunks for chunk in resume_chunks])
+        jd_vector = vectors[0]
         if jd_vector is None:
             st.error("Failed to embed job description")
             return []
-        
-        scored_candidates = []
-        
-        for candidate in candidates_data:
-            # Validate candidate data structure
-            if not isinstance(candidate, dict) or 'resume' not in candidate or 'name' not in candidate:
-                st.warning(f"Skipping invalid candidate record: {candidate}")
-                continue
-            
-            resume_vector = get_embedding(candidate['resume'])
-            
-            if resume_vector is None:
+
+        # (candidate, first row, row count) into the matrix of embedded chunks.
+        embedded = []
+        chunk_vectors = []
+        offset = 1
+        for candidate, resume_chunks in zip(valid_candidates, chunks):
+            candidate_vectors = [vector for vector in vectors[offset:offset + len(resume_chunks)] if vector is not None]
+            offset += len(resume_chunks)
+            if not candidate_vectors:
                 st.warning(f"Could not embed resume for {candidate['name']}")
                 continue
-            
-            # Calculate similarity score
-            score = cosine_similarity([jd_vector], [resume_vector])[0][0]
-            
-            scored_candidates.append({
-                "name": candidate['name'],
-                "score": float(score),
-                "resume": candidate['resume'],
-                "candidate_name": candidate.get('candidate_name', candidate['name'])
-            })
-        
-        # Sort by score descending
-        scored_candidates.sort(key=lambda x: x['score'], reverse=True)
+            embedded.append((candidate, len(chunk_vectors), len(candidate_vectors)))
+            chunk_vectors.extend(candidate_vectors)
+
+        scored_candidates = []
+        if embedded:
+            # get_embeddings returns unit vectors, so one matrix-vector product
+            # is the cosine similarity; negative similarity counts as no match.
+            matrix = np.asarray(chunk_vectors, dtype=np.float32)
+            similarities = np.clip(matrix @ np.asarray(jd_vector, dtype=np.float32), 0.0, 1.0)
+            # A chunked pool scores each resume as the mean of its best-matching windows.
+            scores = np.fromiter(
+                (np.sort(similarities[start:start + count])[-RESUME_CHUNK_TOP_K:].mean() for _, start, count in embedded),
+                dtype=np.float32,
+                count=len(embedded),
+            )
+
+            # Best match first; stable so equal scores keep upload order.
+            for position in np.argsort(-scores, kind="stable"):
+                candidate = embedded[position][0]
+                scored_candidates.append({
+                    "name": candidate['name'],
+                    "score": float(scores[position]),
+                    "resume": candidate['resume'],
+                    "candidate_name": candidate.get('candidate_name', candidate['name'])
+                })
+
         return scored_candidates
         
     except Exception as e:
@@ -359,6 +972,37 @@ def rank_candidates(
 # ======================================================
 # 6. GENERATE IMPROVEMENT SUGGESTIONS
 # ======================================================
+_IMPROVEMENT_SYSTEM_PROMPT = """
+You are an Expert Resume Coach. Your goal is to help candidates IMPROVE their resumes to match a specific job.
+
+INSTRUCTIONS:
+1. **Identify Gaps**: Compare the resume to the job description. What skills/experience does the job require that the resume doesn't clearly show?
+2. **Be Specific**: Don't say "add more skills" - say "The job emphasizes Python for data automation. Your Python experience is mentioned but lacks detail. Add a specific project where you used Python to automate a process."
+3. **Give Actionable Steps**: Provide 3-5 concrete, specific suggestions for how to rewrite or expand existing sections.
+4. **Focus on Content, Not Format**: Suggest what to ADD, REMOVE, or REWRITE in the resume content itself.
+5. **Highlight Strengths**: Also mention what's already strong in the resume for this specific role.
+
+Format your response as a numbered list of improvements.
+"""
+
+
+def _improvement_messages(job_description: str, candidate_resume: str) -> List[Dict[str, str]]:
+    """Build the chat messages shared by the blocking and streaming improvement calls."""
+    user_prompt = f"""
+    JOB DESCRIPTION:
+    {job_description}
+
+    CANDIDATE'S RESUME:
+    {candidate_resume}
+
+    Provide 3-5 specific, actionable suggestions to improve this resume for this exact job.
+    """
+    return [
+        {"role": "system", "content": _IMPROVEMENT_SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt},
+    ]
+
+
 def generate_resume_improvement_suggestions(
     job_description: str, 
     candidate_resume: str
@@ -380,37 +1024,18 @@ def generate_resume_improvement_suggestions(
         
     if not candidate_resume or not candidate_resume.strip():
         return "Error: Candidate resume is empty"
-    
-    system_prompt = """
-    You are an Expert Resume Coach. Your goal is to help candidates IMPROVE their resumes to match a specific job.
-    
-    INSTRUCTIONS:
-    1. **Identify Gaps**: Compare the resume to the job description. What skills/experience does the job require that the resume doesn't clearly show?
-    2. **Be Specific**: Don't say "add more skills" - say "The job emphasizes Python for data automation. Your Python experience is mentioned but lacks detail. Add a specific project where you used Python to automate a process."
-    3. **Give Actionable Steps**: Provide 3-5 concrete, specific suggestions for how to rewrite or expand existing sections.
-    4. **Focus on Content, Not Format**: Suggest what to ADD, REMOVE, or REWRITE in the resume content itself.
-    5. **Highlight Strengths**: Also mention what's already strong in the resume for this specific role.
-    
-    Format your response as a numbered list of improvements.
-    """
 
-    user_prompt = f"""
-    JOB DESCRIPTION:
-    {job_description}
-
-    CANDIDATE'S RESUME:
-    {candidate_resume}
-
-    Provide 3-5 specific, actionable suggestions to improve this resume for this exact job.
-    """
+    jd_vector = get_embedding(job_description)
+    improvement_key = content_hash(candidate_resume)
+    if jd_vector is not None:
+        cached_suggestions = _improvement_cache.get(jd_vector, improvement_key)
+        if cached_suggestions is not None:
+            return cached_suggestions
 
     try:
         response = client.chat.completions.create(
             model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
+            messages=_improvement_messages(job_description, candidate_resume),
             temperature=0.3,
             max_tokens=800
         )
@@ -418,7 +1043,9 @@ def generate_resume_improvement_suggestions(
         feedback = response.choices[0].message.content
         if not feedback:
             return "Error: No suggestions generated"
-            
+
+        if jd_vector is not None:
+            _improvement_cache.set(jd_vector, improvement_key, feedback)
         return feedback
         
     except openai.APIError as e:
@@ -426,9 +1053,108 @@ def generate_resume_improvement_suggestions(
     except Exception as e:
         return f"Error generating suggestions: {str(e)}"
 
+
+def stream_resume_improvement_suggestions(
+    job_description: str,
+    candidate_resume: str
+) -> Iterator[str]:
+    """
+    Stream the same suggestions as generate_resume_improvement_suggestions.
+
+    Suggestions run to several hundred tokens, so yielding them as they are
+    generated lets the first one show up long before the last is written.
+    Errors are yielded as text in the non-streaming format.
+    """
+    if not job_description or not job_description.strip():
+        yield "Error: Job description is empty"
+        return
+
+    if not candidate_resume or not candidate_resume.strip():
+        yield "Error: Candidate resume is empty"
+        return
+
+    jd_vector = get_embedding(job_description)
+    improvement_key = content_hash(candidate_resume)
+    if jd_vector is not None:
+        cached_suggestions = _improvement_cache.get(jd_vector, improvement_key)
+        if cached_suggestions is not None:
+            yield cached_suggestions
+            return
+
+    parts = []
+    try:
+        response = client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=_improvement_messages(job_description, candidate_resume),
+            temperature=0.3,
+            max_tokens=800,
+            stream=True
+        )
+        for chunk in response:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                yield delta
+
+    except openai.APIError as e:
+        yield f"OpenAI API Error: {str(e)}"
+        return
+    except Exception as e:
+        yield f"Error generating suggestions: {str(e)}"
+        return
+
+    if not parts:
+        yield "Error: No suggestions generated"
+    elif jd_vector is not None:
+        _improvement_cache.set(jd_vector, improvement_key, "".join(parts))
+
 # ======================================================
 # 6. FEEDBACK ENGINE FUNCTIONS
 # ======================================================
+_FEEDBACK_SYSTEM_PROMPT = """
+You are an Expert Resume Consultant and a Compliance Officer. Your primary goal is to provide **highly specific, tangible, and constructive feedback** based *only* on the content of the resume and the requirements of the job description (JD).
+
+INSTRUCTIONS FOR TANGIBLE FEEDBACK:
+1. **Analyze the Weak Link:** Identify the single biggest gap where the candidate mentioned a required hard skill but failed to demonstrate sufficient depth, context, or quantifiable results required by the JD.
+2. **Focus on Specificity:** Instead of saying "lacks Python," say, "lacks demonstrated experience using Python for **data pipeline automation** as the JD requires."
+3. **Provide Actionable Advice:** Offer one concrete, actionable suggestion for how they can re-write or strengthen the *existing* experience on their resume to better match the JD's focus (e.g., "Add metrics showing efficiency gains").
+
+THE "RED ZONE" (STRICTLY FORBIDDEN—Legal Compliance):
+- Do NOT mention: Personality, tone, enthusiasm, "culture fit," age, gender, or soft skills.
+
+THE "GREEN ZONE" (ONLY USE THESE):
+- Hard Skills, Objective Metrics, Demonstrated Specificity, and Mismatched Depth.
+
+Write a polite and legally safe rejection email using this structured, tangible advice.
+If a candidate name is provided, address the email to that exact name instead of using placeholders.
+"""
+
+
+def _feedback_messages(
+    job_description: str,
+    candidate_resume: str,
+    candidate_name: Optional[str] = None
+) -> List[Dict[str, str]]:
+    """Build the chat messages shared by the blocking and streaming feedback calls."""
+    user_prompt = f"""
+    CANDIDATE NAME:
+    {candidate_name or "Not available"}
+
+    JOB DESCRIPTION:
+    {job_description}
+
+    CLEANED CANDIDATE RESUME:
+    {candidate_resume}
+
+    Write the rejection email.
+    """
+
+    return [
+        {"role": "system", "content": _FEEDBACK_SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt}
+    ]
+
+
 def generate_compliant_feedback(
     job_description: str, 
     candidate_resume: str,
@@ -451,44 +1177,19 @@ def generate_compliant_feedback(
     if not candidate_resume or not candidate_resume.strip():
         return "Error: Candidate resume is empty"
     
-    system_prompt = """
-    You are an Expert Resume Consultant and a Compliance Officer. Your primary goal is to provide **highly specific, tangible, and constructive feedback** based *only* on the content of the resume and the requirements of the job description (JD).
-
-    INSTRUCTIONS FOR TANGIBLE FEEDBACK:
-    1. **Analyze the Weak Link:** Identify the single biggest gap where the candidate mentioned a required hard skill but failed to demonstrate sufficient depth, context, or quantifiable results required by the JD.
-    2. **Focus on Specificity:** Instead of saying "lacks Python," say, "lacks demonstrated experience using Python for **data pipeline automation** as the JD requires."
-    3. **Provide Actionable Advice:** Offer one concrete, actionable suggestion for how they can re-write or strengthen the *existing* experience on their resume to better match the JD's focus (e.g., "Add metrics showing efficiency gains").
-
-    THE "RED ZONE" (STRICTLY FORBIDDEN—Legal Compliance):
-    - Do NOT mention: Personality, tone, enthusiasm, "culture fit," age, gender, or soft skills.
-    
-    THE "GREEN ZONE" (ONLY USE THESE):
-    - Hard Skills, Objective Metrics, Demonstrated Specificity, and Mismatched Depth.
-
-    Write a polite and legally safe rejection email using this structured, tangible advice.
-    If a candidate name is provided, address the email to that exact name instead of using placeholders.
-    """
+    messages = _feedback_messages(job_description, candidate_resume, candidate_name)
 
-    user_prompt = f"""
-    CANDIDATE NAME:
-    {candidate_name or "Not available"}
-
-    JOB DESCRIPTION:
-    {job_description}
-
-    CLEANED CANDIDATE RESUME:
-    {candidate_resume}
-
-    Write the rejection email.
-    """
+    jd_vector = get_embedding(job_description)
+    feedback_key = content_hash(candidate_resume, candidate_name or "")
+    if jd_vector is not None:
+        cached_feedback = _feedback_cache.get(jd_vector, feedback_key)
+        if cached_feedback is not None:
+            return cached_feedback
 
     try:
         response = client.chat.completions.create(
             model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
+            messages=messages,
             temperature=0.3,
             max_tokens=500
         )
@@ -496,7 +1197,9 @@ def generate_compliant_feedback(
         feedback = response.choices[0].message.content
         if not feedback:
             return "Error: No feedback generated"
-            
+
+        if jd_vector is not None:
+            _feedback_cache.set(jd_vector, feedback_key, feedback)
         return feedback
         
     except openai.APIError as e:
@@ -505,9 +1208,248 @@ def generate_compliant_feedback(
         return f"Error generating feedback: {str(e)}"
 
 
+def stream_compliant_feedback(
+    job_description: str,
+    candidate_resume: str,
+    candidate_name: Optional[str] = None
+) -> Iterator[str]:
+    """
+    Stream the same rejection feedback as generate_compliant_feedback.
+
+    Text is yielded as the model produces it, so callers can show the first
+    words within a fraction of a second instead of waiting for the whole
+    email. Errors are yielded as text in the non-streaming format.
+    """
+    if not job_description or not job_description.strip():
+        yield "Error: Job description is empty"
+        return
+
+    if not candidate_resume or not candidate_resume.strip():
+        yield "Error: Candidate resume is empty"
+        return
+
+    messages = _feedback_messages(job_description, candidate_resume, candidate_name)
+
+    jd_vector = get_embedding(job_description)
+    feedback_key = content_hash(candidate_resume, candidate_name or "")
+    if jd_vector is not None:
+        cached_feedback = _feedback_cache.get(jd_vector, feedback_key)
+        if cached_feedback is not None:
+            yield cached_feedback
+            return
+
+    parts = []
+    try:
+        response = client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=messages,
+            temperature=0.3,
+            max_tokens=500,
+            stream=True
+        )
+        for chunk in response:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                yield delta
+
+    except openai.APIError as e:
+        yield f"OpenAI API Error: {str(e)}"
+        return
+    except Exception as e:
+        yield f"Error generating feedback: {str(e)}"
+        return
+
+    if not parts:
+        yield "Error: No feedback generated"
+    elif jd_vector is not None:
+        _feedback_cache.set(jd_vector, feedback_key, "".join(parts))
+
+
+# Candidates per feedback request in generate_feedback_batch. Above 1, one
+# JSON-mode request drafts several emails, trading a longer single response
+# for fewer requests against the rate limit.
+FEEDBACK_PACK_SIZE = _positive_int_setting("ATS_FEEDBACK_PACK_SIZE", 1)
+
+_PACKED_FEEDBACK_INSTRUCTIONS = """
+
+You will receive several numbered candidates for the same job description.
+Write one separate rejection email per candidate, following every rule above.
+Respond with a JSON object {"feedback": [...]} holding the emails as strings, in candidate order.
+"""
+
+
+def _generate_packed_feedback(job_description: str, candidates: List[Dict[str, str]]) -> List[Optional[str]]:
+    """
+    Draft feedback for a group of candidates with a single chat completion.
+
+    Cached drafts are reused. Candidates the packed response does not
+    resolve are returned as None, for the caller to draft individually.
+    """
+    results: List[Optional[str]] = [None] * len(candidates)
+    jd_vector = get_embedding(job_description) if job_description and job_description.strip() else None
+    pending = []
+    for index, candidate in enumerate(candidates):
+        resume = candidate.get("resume", "")
+        cached_feedback = None
+        if jd_vector is not None and resume.strip():
+            cached_feedback = _feedback_cache.get(jd_vector, content_hash(resume, candidate.get("name") or ""))
+        if cached_feedback is not None:
+            results[index] = cached_feedback
+        elif jd_vector is not None and resume.strip():
+            pending.append(index)
+
+    if len(pending) > 1:
+        candidate_blocks = "\n".join(
+            f"""
+    CANDIDATE {number}:
+    NAME: {candidates[index].get("name") or "Not available"}
+    CLEANED CANDIDATE RESUME:
+    {candidates[index]["resume"]}
+    """
+            for number, index in enumerate(pending, 1)
+        )
+        user_prompt = f"""
+    JOB DESCRIPTION:
+    {job_description}
+    {candidate_blocks}
+    Write the {len(pending)} rejection emails.
+    """
+        try:
+            response = client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": _FEEDBACK_SYSTEM_PROMPT + _PACKED_FEEDBACK_INSTRUCTIONS},
+                    {"role": "user", "content": user_prompt}
+                ],
+                temperature=0.3,
+                max_tokens=min(500 * len(pending), 16000),
+                response_format={"type": "json_object"}
+            )
+            emails = json.loads(response.choices[0].message.content or "{}").get("feedback")
+            if isinstance(emails, list) and len(emails) == len(pending):
+                for index, email in zip(pending, emails):
+                    if isinstance(email, str) and email.strip():
+                        candidate = candidates[index]
+                        _feedback_cache.set(jd_vector, content_hash(candidate["resume"], candidate.get("name") or ""), email)
+                        results[index] = email
+        except Exception:
+            # Any failure leaves the group to the caller's per-candidate path.
+            pass
+
+    return results
+
+
+def generate_feedback_batch(
+    job_description: str,
+    candidates: List[Dict[str, str]],
+    include_improvements: bool = False
+) -> List[Dict[str, str]]:
+    """
+    Draft feedback for several candidates concurrently.
+
+    Every feedback call, and the improvement call for each candidate when
+    requested, is submitted to one thread pool, so a full review costs about
+    as long as the slowest single draft rather than the sum of them. With
+    FEEDBACK_PACK_SIZE above 1, feedback is drafted for that many candidates
+    per request instead.
+
+    Args:
+        job_description: The job description text
+        candidates: Dicts with 'resume' and optional 'name' keys
+        include_improvements: Also draft resume improvement suggestions
+
+    Returns:
+        Dicts with 'feedback' (and 'improvements') text, in input order
+    """
+    if not candidates:
+        return []
+
+    pack_size = FEEDBACK_PACK_SIZE if len(candidates) > 1 else 1
+    # Sized for the worst case, where every packed draft falls back to its own request.
+    task_count = len(candidates) * (2 if include_improvements else 1)
+    with ThreadPoolExecutor(max_workers=min(LLM_MAX_WORKERS, task_count)) as executor:
+        # Per candidate: (future, offset into a packed result or None).
+        feedback = []
+        for start in range(0, len(candidates), pack_size):
+            group = candidates[start:start + pack_size]
+            if pack_size > 1:
+                future = executor.submit(_with_llm_slot, _generate_packed_feedback, job_description, group)
+                feedback.extend((future, offset) for offset in range(len(group)))
+            else:
+                candidate = group[0]
+                feedback.append((executor.submit(_with_llm_slot, generate_compliant_feedback, job_description, candidate.get("resume", ""), candidate.get("name")), None))
+        improvements = [
+            executor.submit(_with_llm_slot, generate_resume_improvement_suggestions, job_description, candidate.get("resume", ""))
+            for candidate in candidates
+        ] if include_improvements else []
+
+        drafts = []
+        fallbacks = {}
+        for position, (future, offset) in enumerate(feedback):
+            text = future.result() if offset is None else future.result()[offset]
+            if text is None:
+                # Unresolved packed drafts go back to the pool one request each.
+                candidate = candidates[position]
+                fallbacks[position] = executor.submit(_with_llm_slot, generate_compliant_feedback, job_description, candidate.get("resume", ""), candidate.get("name"))
+            drafts.append({"feedback": text})
+        for position, future in fallbacks.items():
+            drafts[position]["feedback"] = future.result()
+        for draft, future in zip(drafts, improvements):
+            draft["improvements"] = future.result()
+        return drafts
+
+
 # ======================================================
 # 7. PROFILE-TO-JD MATCHING & CV OPTIMIZATION
 # ======================================================
+_PROFILE_MATCH_SYSTEM_PROMPT = """
+You are an expert recruiter analyzing candidate profile against job requirements.
+
+INSTRUCTIONS:
+1. Identify top 3 matching areas between profile and JD
+2. Identify top 3 gaps/missing skills
+3. Provide brief recommendation (1-2 sentences)
+
+Format as:
+**Matching Strengths:**
+- Strength 1
+- Strength 2
+- Strength 3
+
+**Skills Gaps:**
+- Gap 1
+- Gap 2
+- Gap 3
+
+**Recommendation:**
+[Brief 1-2 sentence recommendation]
+"""
+
+
+def _analyse_profile_match(profile_text: str, job_description: str) -> Optional[str]:
+    user_prompt = f"""
+    CANDIDATE PROFILE:
+    {profile_text}
+
+    JOB DESCRIPTION:
+    {job_description}
+
+    Analyze this match.
+    """
+
+    response = client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": _PROFILE_MATCH_SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt}
+        ],
+        temperature=0.3,
+        max_tokens=500
+    )
+    return response.choices[0].message.content
+
+
 def match_profile_to_jd(profile, work_experiences, achievements_by_experience, skills, job_description):
     """
     Match entire applicant profile against job description.
@@ -528,74 +1470,100 @@ def match_profile_to_jd(profile, work_experiences, achievements_by_experience, s
         WORK EXPERIENCE:
         """
 
+        # Collected and joined once rather than re-copied on every +=.
+        profile_parts = [profile_text]
         for exp in work_experiences:
-            profile_text += f"""
+            profile_parts.append(f"""
             {exp.get('position', '')} at {exp.get('company', '')}
             {exp.get('description', '')}
-            """
+            """)
             exp_id = exp.get('id')
             if exp_id and exp_id in achievements_by_experience:
                 for ach in achievements_by_experience[exp_id]:
-                    profile_text += f"- {ach.get('achievement', '')} {ach.get('metric', '')}\n"
-
-        profile_vector = get_embedding(profile_text)
-        jd_vector = get_embedding(job_description)
-
-        if not profile_vector or not jd_vector:
+                    profile_parts.append(f"- {ach.get('achievement', '')} {ach.get('metric', '')}\n")
+        profile_text = "".join(profile_parts)
+
+        # Re-running a match on an unchanged profile and JD reuses the analysis.
+        cache_key = content_hash(profile_text, job_description)
+        cached_match = _profile_match_cache.get(cache_key)
+        if cached_match is not None:
+            return dict(cached_match)
+
+        # The analysis does not depend on the score, so it is drafted while the pair is embedded.
+        abandoned = threading.Event()
+
+        def draft_analysis():
+            with _llm_slots:
+                # Skip the paid call if embedding failed while waiting for a slot.
+                return None if abandoned.is_set() else _analyse_profile_match(profile_text, job_description)
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        analysis_future = executor.submit(draft_analysis)
+        embedded = False
+        try:
+            profile_vector, jd_vector = get_embeddings([profile_text, job_description])
+            embedded = bool(profile_vector and jd_vector)
+        finally:
+            if not embedded:
+                abandoned.set()
+            # Never block on the analysis when it is being thrown away.
+            executor.shutdown(wait=False, cancel_futures=not embedded)
+
+        if not embedded:
             raise Exception("Could not generate embeddings")
 
-        score = cosine_similarity([jd_vector], [profile_vector])[0][0]
-        match_score = float(score)
+        match_score = cosine_score(jd_vector, profile_vector)
+        analysis = analysis_future.result()
 
-        system_prompt = """
-        You are an expert recruiter analyzing candidate profile against job requirements.
+        result = {"match_score": match_score, "analysis": analysis}
+        if analysis:
+            _profile_match_cache.set(cache_key, dict(result))
+        return result
 
-        INSTRUCTIONS:
-        1. Identify top 3 matching areas between profile and JD
-        2. Identify top 3 gaps/missing skills
-        3. Provide brief recommendation (1-2 sentences)
+    except Exception as e:
+        st.error(f"Error matching profile to JD: {str(e)}")
+        return {"match_score": 0.0, "analysis": "Error generating analysis"}
 
-        Format as:
-        **Matching Strengths:**
-        - Strength 1
-        - Strength 2
-        - Strength 3
 
-        **Skills Gaps:**
-        - Gap 1
-        - Gap 2
-        - Gap 3
+_CV_OPTIMIZATION_SYSTEM_PROMPT = """
+You are an expert CV optimizer and recruiter.
 
-        **Recommendation:**
-        [Brief 1-2 sentence recommendation]
-        """
+TASK: Rewrite the CV content to better match the job description.
 
-        user_prompt = f"""
-        CANDIDATE PROFILE:
-        {profile_text}
+INSTRUCTIONS:
+1. **Rewrite Professional Summary**: Create a new summary that:
+   - Highlights skills/experience relevant to JD
+   - Uses keywords from the job description
+   - Shows alignment with role requirements
 
-        JOB DESCRIPTION:
-        {job_description}
+2. **Expand Work Experience**: For each job, enhance descriptions to:
+   - Add relevant keywords from JD
+   - Expand on achievements showing impact
+   - Reorder bullets by relevance to JD
+   - Include specific metrics/results
 
-        Analyze this match.
-        """
+3. **Reorder Skills**: Prioritize skills that:
+   - Match JD requirements
+   - Appear in job description
+   - Are most relevant to the role
 
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.3,
-            max_tokens=500
-        )
+Return ONLY the rewritten content in this format:
 
-        analysis = response.choices[0].message.content
-        return {"match_score": match_score, "analysis": analysis}
+OPTIMIZED_SUMMARY:
+[Rewritten 2-3 sentence summary]
 
-    except Exception as e:
-        st.error(f"Error matching profile to JD: {str(e)}")
-        return {"match_score": 0.0, "analysis": "Error generating analysis"}
+OPTIMIZED_EXPERIENCE:
+[For each experience, in format:]
+Position: [title]
+Company: [company]
+Description: [expanded description]
+Achievements:
+- [reordered/expanded achievement 1]
+- [reordered/expanded achievement 2]
+
+OPTIMIZED_SKILLS:
+[Comma-separated list, ordered by relevance]
+"""
 
 
 def optimize_cv_for_jd(profile_text, job_description, work_experiences_text):
@@ -606,47 +1574,12 @@ def optimize_cv_for_jd(profile_text, job_description, work_experiences_text):
     Returns:
         str with optimized content (or error message)
     """
-    try:
-        system_prompt = """
-        You are an expert CV optimizer and recruiter.
-
-        TASK: Rewrite the CV content to better match the job description.
-
-        INSTRUCTIONS:
-        1. **Rewrite Professional Summary**: Create a new summary that:
-           - Highlights skills/experience relevant to JD
-           - Uses keywords from the job description
-           - Shows alignment with role requirements
-
-        2. **Expand Work Experience**: For each job, enhance descriptions to:
-           - Add relevant keywords from JD
-           - Expand on achievements showing impact
-           - Reorder bullets by relevance to JD
-           - Include specific metrics/results
-
-        3. **Reorder Skills**: Prioritize skills that:
-           - Match JD requirements
-           - Appear in job description
-           - Are most relevant to the role
-
-        Return ONLY the rewritten content in this format:
-
-        OPTIMIZED_SUMMARY:
-        [Rewritten 2-3 sentence summary]
-
-        OPTIMIZED_EXPERIENCE:
-        [For each experience, in format:]
-        Position: [title]
-        Company: [company]
-        Description: [expanded description]
-        Achievements:
-        - [reordered/expanded achievement 1]
-        - [reordered/expanded achievement 2]
-
-        OPTIMIZED_SKILLS:
-        [Comma-separated list, ordered by relevance]
-        """
+    cache_key = content_hash(profile_text or "", job_description or "", work_experiences_text or "")
+    cached_content = _cv_optimization_cache.get(cache_key)
+    if cached_content is not None:
+        return cached_content
 
+    try:
         user_prompt = f"""
         JOB DESCRIPTION:
         {job_description}
@@ -663,7 +1596,7 @@ def optimize_cv_for_jd(profile_text, job_description, work_experiences_text):
         response = client.chat.completions.create(
             model="gpt-4o",
             messages=[
-                {"role": "system", "content": system_prompt},
+                {"role": "system", "content": _CV_OPTIMIZATION_SYSTEM_PROMPT},
                 {"role": "user", "content": user_prompt}
             ],
             temperature=0.4,
@@ -671,6 +1604,8 @@ def optimize_cv_for_jd(profile_text, job_description, work_experiences_text):
         )
 
         optimized_content = response.choices[0].message.content
+        if optimized_content:
+            _cv_optimization_cache.set(cache_key, optimized_content)
         return optimized_content
 
     except Exception as e:
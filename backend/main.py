@@ -10,13 +10,6 @@ app = FastAPI(
     description="Backend API for the Fydara recruiter and candidate experiences.",
     version="0.1.0",
 )
-@app.get("/api/health")
-def health():
-    return {
-        "status": "ok",
-        "service": "Fydara API"
-    }
-
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -40,5 +33,6 @@ app.include_router(communications.router, prefix="/api")
 
 
 @app.get("/health", tags=["system"])
+@app.get("/api/health", tags=["system"])
 def health():
     return {"status": "ok", "service": "fydara-api"}
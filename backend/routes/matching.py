@@ -1,20 +1,32 @@
 """ATS matching, extraction, and feedback routes."""
 
+from typing import Dict, Iterable, Iterator, List, Union
+
 from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 
-from backend.schemas import BatchMatchRequest, FeedbackRequest, ProfileMatchRequest
+from backend.schemas import BatchMatchRequest, FeedbackBatchRequest, FeedbackRequest, ImprovementRequest, ProfileMatchRequest
 from services.ats_service import (
     ATSConfigurationError,
+    collect_ranking_embeddings,
     extract_resume_text,
+    extract_resume_texts,
     generate_candidate_feedback,
+    generate_candidate_feedback_batch,
     generate_candidate_improvements,
     match_profile_to_jd,
+    queue_ranking_embeddings,
     rank_resumes,
+    stream_candidate_feedback,
+    stream_candidate_improvements,
     analyse_role_fit,
 )
 
 router = APIRouter(prefix="/matching", tags=["matching"])
 
+PDF_CONTENT_TYPES = {"application/pdf", "application/x-pdf"}
+
 
 def _service_error(error: Exception) -> HTTPException:
     status_code = 503 if isinstance(error, ATSConfigurationError) else 500
@@ -23,14 +35,25 @@ def _service_error(error: Exception) -> HTTPException:
 
 @router.post("/resume/extract")
 async def extract_resume(file: UploadFile = File(...)):
-    if file.content_type not in {"application/pdf", "application/x-pdf"}:
+    if file.content_type not in PDF_CONTENT_TYPES:
         raise HTTPException(status_code=415, detail="Only PDF resumes are supported")
     try:
-        return {"filename": file.filename, "text": extract_resume_text(file.file)}
+        # Parsing is CPU-bound, so keep it off the event loop like the batch route.
+        return {"filename": file.filename, "text": await run_in_threadpool(extract_resume_text, file.file)}
     except ValueError as error:
         raise HTTPException(status_code=400, detail=str(error)) from error
 
 
+@router.post("/resume/extract/batch")
+async def extract_resumes(files: List[UploadFile] = File(...), clean: bool = False):
+    for file in files:
+        if file.content_type not in PDF_CONTENT_TYPES:
+            raise HTTPException(status_code=415, detail=f"Only PDF resumes are supported: {file.filename}")
+    # Read each spooled upload only when the extractor is ready for it.
+    uploads = ((file.filename, file.file.read()) for file in files)
+    return {"resumes": await run_in_threadpool(extract_resume_texts, uploads, clean)}
+
+
 @router.post("/batch")
 def match_batch(request: BatchMatchRequest):
     try:
@@ -40,6 +63,23 @@ def match_batch(request: BatchMatchRequest):
         raise _service_error(error) from error
 
 
+@router.post("/batch/embeddings")
+def queue_batch_embeddings(request: BatchMatchRequest):
+    try:
+        candidates = [candidate.dict() for candidate in request.candidates]
+        return queue_ranking_embeddings(request.job_description, candidates)
+    except Exception as error:
+        raise _service_error(error) from error
+
+
+@router.get("/batch/embeddings/{batch_id}")
+def collect_batch_embeddings(batch_id: str):
+    try:
+        return collect_ranking_embeddings(batch_id)
+    except Exception as error:
+        raise _service_error(error) from error
+
+
 @router.post("/analysis")
 def analyse_match(request: FeedbackRequest):
     return analyse_role_fit(request.job_description, request.candidate_resume)
@@ -59,6 +99,36 @@ def match_profile(request: ProfileMatchRequest):
         raise _service_error(error) from error
 
 
+def _signature_placeholders(request: Union[FeedbackRequest, FeedbackBatchRequest]) -> Dict[str, str]:
+    return {
+        "[Your Name]": request.recruiter_name or "Fydara Hiring Team",
+        "[Your Job Title]": request.recruiter_job_title or "Recruitment Team",
+    }
+
+
+def _fill_placeholders(text: str, placeholders: Dict[str, str]) -> str:
+    for placeholder, value in placeholders.items():
+        text = text.replace(placeholder, value)
+    return text
+
+
+def _stream_with_placeholders(chunks: Iterable[str], placeholders: Dict[str, str]) -> Iterator[str]:
+    """Fill placeholders in streamed text, holding back any that are split across chunks."""
+    longest = max(len(placeholder) for placeholder in placeholders)
+    pending = ""
+    for chunk in chunks:
+        pending += chunk
+        # Keep an unclosed "[" back until the rest of a possible placeholder arrives.
+        cut = pending.rfind("[")
+        if cut == -1 or "]" in pending[cut:] or len(pending) - cut >= longest:
+            cut = len(pending)
+        ready, pending = pending[:cut], pending[cut:]
+        if ready:
+            yield _fill_placeholders(ready, placeholders)
+    if pending:
+        yield _fill_placeholders(pending, placeholders)
+
+
 @router.post("/feedback")
 def create_feedback(request: FeedbackRequest):
     try:
@@ -67,15 +137,43 @@ def create_feedback(request: FeedbackRequest):
             request.candidate_resume,
             request.candidate_name,
         )
-        feedback = feedback.replace("[Your Name]", request.recruiter_name or "Fydara Hiring Team")
-        feedback = feedback.replace("[Your Job Title]", request.recruiter_job_title or "Recruitment Team")
         return {
-            "feedback": feedback
+            "feedback": _fill_placeholders(feedback, _signature_placeholders(request))
         }
     except Exception as error:
         raise _service_error(error) from error
 
 
+@router.post("/feedback/batch")
+def create_feedback_batch(request: FeedbackBatchRequest):
+    try:
+        drafts = generate_candidate_feedback_batch(
+            request.job_description,
+            [{"name": candidate.candidate_name or candidate.name, "resume": candidate.resume} for candidate in request.candidates],
+            request.include_improvements,
+        )
+    except Exception as error:
+        raise _service_error(error) from error
+    placeholders = _signature_placeholders(request)
+    for candidate, draft in zip(request.candidates, drafts):
+        draft["name"] = candidate.name
+        draft["feedback"] = _fill_placeholders(draft["feedback"], placeholders)
+    return {"feedback": drafts}
+
+
+@router.post("/feedback/stream")
+def stream_feedback(request: FeedbackRequest):
+    chunks = stream_candidate_feedback(
+        request.job_description,
+        request.candidate_resume,
+        request.candidate_name,
+    )
+    return StreamingResponse(
+        _stream_with_placeholders(chunks, _signature_placeholders(request)),
+        media_type="text/plain; charset=utf-8",
+    )
+
+
 @router.post("/invite")
 def create_interview_invite(request: FeedbackRequest):
     candidate_name = request.candidate_name or "there"
@@ -96,13 +194,22 @@ Best regards,
 
 
 @router.post("/improvements")
-def create_improvements(request: FeedbackRequest):
+def create_improvements(request: ImprovementRequest):
     try:
         return {
             "improvements": generate_candidate_improvements(
                 request.job_description,
                 request.candidate_resume,
+                request.force,
             )
         }
     except Exception as error:
         raise _service_error(error) from error
+
+
+@router.post("/improvements/stream")
+def stream_improvements(request: ImprovementRequest):
+    return StreamingResponse(
+        stream_candidate_improvements(request.job_description, request.candidate_resume, request.force),
+        media_type="text/plain; charset=utf-8",
+    )
@@ -76,6 +76,18 @@ class FeedbackRequest(BaseModel):
     recruiter_job_title: Optional[str] = None
 
 
+class ImprovementRequest(FeedbackRequest):
+    force: bool = False
+
+
+class FeedbackBatchRequest(BaseModel):
+    job_description: str = Field(min_length=1)
+    candidates: List[CandidateResume]
+    include_improvements: bool = False
+    recruiter_name: Optional[str] = None
+    recruiter_job_title: Optional[str] = None
+
+
 class CVRequest(BaseModel):
     profile: Dict[str, Any]
     work_experiences: List[Dict[str, Any]] = Field(default_factory=list)
@@ -8,10 +8,7 @@ from reportlab.pdfgen import canvas as pdf_canvas
 import io
 import re
 from typing import List, Dict
-from docx import Document
-from docx.shared import Pt, Inches
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from ats_engine import get_embedding
+from ats_engine import cosine_score, get_embeddings
 
 # ======================================================
 # PAGE-NUMBERED CANVAS
@@ -69,8 +66,8 @@ def _prepare_text_blocks(text: str) -> List[str]:
 
     blocks = []
     for paragraph in re.split(r"\n{2,}", cleaned):
-        lines = [line.strip() for line in paragraph.split("\n") if line.strip()]
-        merged = " ".join(lines).strip()
+        stripped_lines = (line.strip() for line in paragraph.split("\n"))
+        merged = " ".join(line for line in stripped_lines if line)
         if merged:
             blocks.extend(_split_inline_numbered_items(merged))
     return blocks
@@ -271,25 +268,21 @@ def generate_ats_optimized_cv(
     match_score = 0.0
     if job_description:
         # Build CV text for matching
-        cv_content = f"{profile.get('full_name', '')} "
-        cv_content += profile.get('professional_summary', '') + " "
+        cv_parts = [profile.get('full_name', ''), profile.get('professional_summary', '')]
         for exp in work_experiences:
-            cv_content += f"{exp.get('position', '')} {exp.get('company', '')} "
-            cv_content += exp.get('description', '') + " "
+            cv_parts.append(f"{exp.get('position', '')} {exp.get('company', '')}")
+            cv_parts.append(exp.get('description', ''))
             exp_id = exp.get('id')
             if exp_id and exp_id in achievements_by_experience:
-                for ach in achievements_by_experience[exp_id]:
-                    cv_content += ach.get('achievement', '') + " "
-        cv_content += " ".join([s.get('skill_name', '') for s in skills])
+                cv_parts.extend(ach.get('achievement', '') for ach in achievements_by_experience[exp_id])
+        cv_parts.append(" ".join([s.get('skill_name', '') for s in skills]))
+        cv_content = " ".join(cv_parts)
         
         # Get match score
-        from sklearn.metrics.pairwise import cosine_similarity
-
-        cv_vector = get_embedding(cv_content)
-        jd_vector = get_embedding(job_description)
+        cv_vector, jd_vector = get_embeddings([cv_content, job_description])
         
         if cv_vector and jd_vector:
-            match_score = float(cosine_similarity([jd_vector], [cv_vector])[0][0])
+            match_score = cosine_score(jd_vector, cv_vector)
     
     return pdf_bytes, match_score
 
@@ -378,6 +371,11 @@ def generate_cv_docx(
     Returns:
         DOCX file as bytes.
     """
+    # python-docx (and lxml) load only when a DOCX is actually requested.
+    from docx import Document
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.shared import Inches, Pt
+
     doc = Document()
     doc.sections[0].top_margin = Inches(0.5)
     doc.sections[0].bottom_margin = Inches(0.5)
@@ -568,20 +566,21 @@ def generate_optimized_cv_content(
     Skills: {', '.join([s.get('skill_name', '') for s in skills])}
     """
 
-    work_exp_text = ""
+    work_exp_parts = []
     for exp in work_experiences:
-        work_exp_text += f"""
+        work_exp_parts.append(f"""
         Position: {exp.get('position', '')}
         Company: {exp.get('company', '')}
         Period: {exp.get('start_date', '')} to {exp.get('end_date', 'Present' if exp.get('current_job') else '')}
         Description: {exp.get('description', '')}
 
         Achievements:
-        """
+        """)
         exp_id = exp.get('id')
         if exp_id and exp_id in achievements_by_experience:
             for ach in achievements_by_experience[exp_id]:
-                work_exp_text += f"- {ach.get('achievement', '')} ({ach.get('metric', '')})\n"
+                work_exp_parts.append(f"- {ach.get('achievement', '')} ({ach.get('metric', '')})\n")
+    work_exp_text = "".join(work_exp_parts)
 
     optimized_content = optimize_cv_for_jd(profile_text, job_description, work_exp_text)
 
@@ -611,19 +610,21 @@ def generate_optimized_cv_content(
 
     PROFESSIONAL EXPERIENCE
     """
+    cv_parts = [cv_text]
     for idx, exp in enumerate(optimized_experiences, 1):
-        cv_text += f"""
+        cv_parts.append(f"""
     {idx}. {exp.get('position', '')} | {exp.get('company', '')}
     {exp.get('start_date', '')} – {exp.get('end_date', 'Present' if exp.get('current_job') else '')}
     {exp.get('description', '')}
-    """
+    """)
         exp_id = exp.get('id')
         if exp_id and exp_id in optimized_achievements:
-            cv_text += "Achievements\n"
+            cv_parts.append("Achievements\n")
             for ach in optimized_achievements[exp_id]:
-                cv_text += f"• {ach.get('achievement', '')} ({ach.get('metric', '')})\n"
-    cv_text += "\nSKILLS\n"
-    cv_text += ", ".join([s.get('skill_name', '') for s in optimized_skills])
+                cv_parts.append(f"• {ach.get('achievement', '')} ({ach.get('metric', '')})\n")
+    cv_parts.append("\nSKILLS\n")
+    cv_parts.append(", ".join([s.get('skill_name', '') for s in optimized_skills]))
+    cv_text = "".join(cv_parts)
 
     return {
         "profile": optimized_profile,
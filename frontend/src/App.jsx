@@ -1,4 +1,4 @@
-import { useEffect, useMemo, useRef, useState } from "react";
+import { memo, useEffect, useMemo, useRef, useState } from "react";
 import {
   ArrowRight,
   BarChart3,
@@ -58,6 +58,9 @@ function Button({ children, variant = "primary", icon: Icon, className = "", ...
   );
 }
 
+// Report tiers, highest first: [label, range shown, minimum score].
+const MATCH_TIERS = [["Excellent", "80-100", 80], ["Good", "65-79", 65], ["Fair", "50-64", 50], ["Limited", "0-49", -Infinity]];
+
 function Score({ value, compact = false }) {
   const tone = value >= 80 ? "excellent" : value >= 65 ? "good" : "fair";
   return <span className={`score score-${tone} ${compact ? "score-compact" : ""}`}>{value}%</span>;
@@ -549,6 +552,21 @@ function Optimizer({ user, setPage }) {
   );
 }
 
+function JobDescriptionInput({ value, onCommit, placeholder }) {
+  // Typing edits a local draft; the shared screening state, which resets the
+  // review and triggers an autosave, only changes once per typing pause or on blur.
+  const [draft, setDraft] = useState(value);
+  const commitRef = useRef(onCommit);
+  commitRef.current = onCommit;
+  useEffect(() => { setDraft(value); }, [value]);
+  useEffect(() => {
+    if (draft === value) return undefined;
+    const timeout = setTimeout(() => commitRef.current(draft), 300);
+    return () => clearTimeout(timeout);
+  }, [draft, value]);
+  return <textarea value={draft} onChange={(event) => setDraft(event.target.value)} onBlur={() => { if (draft !== value) onCommit(draft); }} placeholder={placeholder} />;
+}
+
 function RecruiterWorkspace({ onOpenReport, screening, recruiterEmail }) {
   const [query, setQuery] = useState("");
   const [showFilters, setShowFilters] = useState(false);
@@ -582,16 +600,33 @@ function RecruiterWorkspace({ onOpenReport, screening, recruiterEmail }) {
   } = screening;
 
   const reviewedCandidates = useMemo(() => candidates.filter((candidate) => typeof candidate.score === "number"), [candidates]);
-  const rows = useMemo(() => reviewedCandidates.filter((candidate) => {
-    const matchesQuery = `${candidate.name} ${candidate.role} ${(candidate.skills || []).join(" ")}`.toLowerCase().includes(query.toLowerCase());
-    const matchesStatus = statusFilter === "All" || candidate.status === statusFilter;
-    const matchesScore = (candidate.score || 0) >= minScore;
-    return matchesQuery && matchesStatus && matchesScore;
-  }), [reviewedCandidates, query, statusFilter, minScore]);
-  const topScore = reviewedCandidates.length ? Math.max(...reviewedCandidates.map((candidate) => candidate.score || 0)) : 0;
-  const averageScore = reviewedCandidates.length ? Math.round(reviewedCandidates.reduce((total, candidate) => total + (candidate.score || 0), 0) / reviewedCandidates.length) : 0;
-  const shortlisted = reviewedCandidates.filter((candidate) => (candidate.score || 0) >= threshold).length;
-  const belowThreshold = reviewedCandidates.filter((candidate) => (candidate.score || 0) < threshold).length;
+  // Search text only changes with the ranking, not with each filter keystroke.
+  const searchableCandidates = useMemo(() => reviewedCandidates.map((candidate) => [candidate, `${candidate.name} ${candidate.role} ${(candidate.skills || []).join(" ")}`.toLowerCase()]), [reviewedCandidates]);
+  const rows = useMemo(() => {
+    const needle = query.toLowerCase();
+    return searchableCandidates.filter(([candidate, haystack]) => {
+      const matchesStatus = statusFilter === "All" || candidate.status === statusFilter;
+      const matchesScore = (candidate.score || 0) >= minScore;
+      return matchesStatus && matchesScore && haystack.includes(needle);
+    }).map(([candidate]) => candidate);
+  }, [searchableCandidates, query, statusFilter, minScore]);
+  const { topScore, averageScore, shortlisted } = useMemo(() => {
+    let top = 0;
+    let total = 0;
+    let aboveThreshold = 0;
+    for (const candidate of reviewedCandidates) {
+      const score = candidate.score || 0;
+      top = Math.max(top, score);
+      total += score;
+      if (score >= threshold) aboveThreshold += 1;
+    }
+    return {
+      topScore: top,
+      averageScore: reviewedCandidates.length ? Math.round(total / reviewedCandidates.length) : 0,
+      shortlisted: aboveThreshold,
+    };
+  }, [reviewedCandidates, threshold]);
+  const belowThreshold = reviewedCandidates.length - shortlisted;
   const selectedMessage = selectedCandidate ? candidateMessages[selectedCandidate.name] : null;
   const selectedReviewed = selectedCandidate ? Boolean(reviewedMessages[selectedCandidate.name]) : false;
   const selectedSent = selectedCandidate ? Boolean(sentMessages[selectedCandidate.name]) : false;
@@ -627,15 +662,17 @@ function RecruiterWorkspace({ onOpenReport, screening, recruiterEmail }) {
     setStatus(`Extracting ${files.length} resume${files.length === 1 ? "" : "s"}...`);
 
     try {
-      const extracted = [];
-      for (const file of files) {
-        const result = await api.extractResume(file);
-        extracted.push({
-          name: file.name.replace(/\.pdf$/i, "").replace(/[_-]+/g, " "),
-          resume: result.text,
-          email: inferCandidateEmail(result.text),
-        });
-      }
+      const { resumes } = await api.extractResumes(files);
+      const failed = resumes.filter((result) => result.error);
+      if (failed.length === resumes.length) throw new Error(failed[0].error);
+      // The same resume dropped in twice would be ranked and drafted twice; keep the first copy.
+      const seenTexts = new Set();
+      const extracted = resumes.filter((result) => !result.error && !seenTexts.has(result.text) && seenTexts.add(result.text)).map((result) => ({
+        name: result.filename.replace(/\.pdf$/i, "").replace(/[_-]+/g, " "),
+        resume: result.text,
+        email: inferCandidateEmail(result.text),
+      }));
+      const duplicates = resumes.length - failed.length - extracted.length;
 
       const nextCandidates = extracted.map((candidate) => ({
         name: candidate.name,
@@ -649,7 +686,8 @@ function RecruiterWorkspace({ onOpenReport, screening, recruiterEmail }) {
 
       setCandidates(nextCandidates);
       setSelectedCandidate(nextCandidates[0] || null);
-      setStatus(`${nextCandidates.length} resume${nextCandidates.length === 1 ? "" : "s"} staged. Paste or confirm the JD, then click Review CVs to rank them.`);
+      setStatus(`${nextCandidates.length} resume${nextCandidates.length === 1 ? "" : "s"} staged${duplicates ? ` (${duplicates} duplicate${duplicates === 1 ? "" : "s"} skipped)` : ""}. Paste or confirm the JD, then click Review CVs to rank them.`);
+      if (failed.length) setError(`Could not read ${failed.map((result) => result.filename).join(", ")}.`);
     } catch (err) {
       setError(err.message);
       setStatus("");
@@ -684,8 +722,10 @@ function RecruiterWorkspace({ onOpenReport, screening, recruiterEmail }) {
           resume: candidate.resume || `${candidate.role} ${(candidate.skills || []).join(" ")}`,
         })),
       });
+      // Results come back sorted by score, so match them to staged candidates by name, not position.
+      const stagedByName = new Map(candidates.map((candidate) => [candidate.name, candidate]));
       const rankedCandidates = ranked.candidates.map((candidate, index) => ({
-        name: candidate.candidate_name || candidate.name || candidates[index]?.name || `Candidate ${index + 1}`,
+        name: candidate.candidate_name || candidate.name || `Candidate ${index + 1}`,
         role: getJobTitle(jobDescription),
         score: Math.round((candidate.score || 0) * 100),
         status: "Reviewing",
@@ -694,47 +734,61 @@ function RecruiterWorkspace({ onOpenReport, screening, recruiterEmail }) {
         missing_requirements: candidate.missing_requirements || [],
         bonus_skills: candidate.bonus_skills || [],
         suggestions: candidate.suggestions || [],
-        resume: candidate.resume || candidates[index]?.resume,
-        email: candidates[index]?.email || inferCandidateEmail(candidate.resume || candidates[index]?.resume),
+        resume: candidate.resume || stagedByName.get(candidate.name)?.resume,
+        email: stagedByName.get(candidate.name)?.email || inferCandidateEmail(candidate.resume || stagedByName.get(candidate.name)?.resume),
       }));
       const nextMessages = {};
-      const nextCandidates = [];
-
-      for (const candidate of rankedCandidates) {
-        const payload = {
-          job_description: jobDescription,
-          candidate_resume: candidate.resume || `${candidate.role} ${(candidate.skills || []).join(" ")}`,
-          candidate_name: candidate.name,
-          recruiter_name: recruiterProfile.full_name || "",
-          recruiter_job_title: recruiterProfile.job_title || "",
+      const payloadFor = (candidate) => ({
+        job_description: jobDescription,
+        candidate_resume: candidate.resume || `${candidate.role} ${(candidate.skills || []).join(" ")}`,
+        candidate_name: candidate.name,
+        recruiter_name: recruiterProfile.full_name || "",
+        recruiter_job_title: recruiterProfile.job_title || "",
+      });
+      const rejected = rankedCandidates.filter((candidate) => (candidate.score || 0) < threshold);
+      const shortlisted = rankedCandidates.filter((candidate) => (candidate.score || 0) >= threshold);
+      setStatus(`Drafting messages for ${rankedCandidates.length} candidate${rankedCandidates.length === 1 ? "" : "s"}...`);
+
+      // Rejection drafts are generated concurrently in one request rather than one after another.
+      const [feedbackResult, invites] = await Promise.all([
+        rejected.length
+          ? api.feedbackBatch({
+            job_description: jobDescription,
+            candidates: rejected.map((candidate) => ({ name: candidate.name, resume: payloadFor(candidate).candidate_resume })),
+            recruiter_name: recruiterProfile.full_name || "",
+            recruiter_job_title: recruiterProfile.job_title || "",
+          })
+          : { feedback: [] },
+        Promise.all(shortlisted.map((candidate) => api.invite(payloadFor(candidate)))),
+      ]);
+      rejected.forEach((candidate, index) => {
+        nextMessages[candidate.name] = {
+          type: "feedback",
+          title: "Personalised rejection feedback",
+          body: feedbackResult.feedback[index]?.feedback,
         };
-
-        if ((candidate.score || 0) < threshold) {
-          const result = await api.feedback(payload);
-          nextMessages[candidate.name] = {
-            type: "feedback",
-            title: "Personalised rejection feedback",
-            body: result.feedback,
-          };
-          nextCandidates.push({ ...candidate, status: "Reject" });
-        } else {
-          const result = await api.invite(payload);
-          nextMessages[candidate.name] = {
-            type: "invite",
-            title: "Interview invite",
-            subject: result.subject,
-            body: result.invite,
-          };
-          nextCandidates.push({ ...candidate, status: "Shortlist" });
-        }
-      }
+      });
+      shortlisted.forEach((candidate, index) => {
+        nextMessages[candidate.name] = {
+          type: "invite",
+          title: "Interview invite",
+          subject: invites[index].subject,
+          body: invites[index].invite,
+        };
+      });
+      const nextCandidates = rankedCandidates.map((candidate) => ({
+        ...candidate,
+        status: (candidate.score || 0) < threshold ? "Reject" : "Shortlist",
+      }));
 
       setCandidates(nextCandidates);
       setSelectedCandidate(nextCandidates[0] || null);
       setCandidateMessages(nextMessages);
       setHasReviewed(true);
       const nextBelowThreshold = nextCandidates.filter((candidate) => candidate.score < threshold).length;
-      setStatus(`${nextBelowThreshold} feedback email${nextBelowThreshold === 1 ? "" : "s"} and ${nextCandidates.length - nextBelowThreshold} interview invite${nextCandidates.length - nextBelowThreshold === 1 ? "" : "s"} generated.`);
+      const prefiltered = ranked.candidates.filter((candidate) => candidate.prefiltered).length;
+      const prefilterNote = prefiltered ? ` Semantic matching ran on the ${ranked.candidates.length - prefiltered} of ${ranked.candidates.length} CVs with the most requirement evidence.` : "";
+      setStatus(`${nextBelowThreshold} feedback email${nextBelowThreshold === 1 ? "" : "s"} and ${nextCandidates.length - nextBelowThreshold} interview invite${nextCandidates.length - nextBelowThreshold === 1 ? "" : "s"} generated.${prefilterNote}`);
     } catch (err) {
       setError(err.message);
       setStatus("");
@@ -788,7 +842,7 @@ function RecruiterWorkspace({ onOpenReport, screening, recruiterEmail }) {
       <section className="page-heading"><div><span className="eyebrow">Recruiter workspace</span><h1>{jobTitle}</h1><p>Start with a job description, upload resumes, then review CVs when you are ready to rank them.</p>{workspaceStatus && <small className="workspace-save-status">{workspaceStatus}</small>}</div><div className="heading-actions"><input ref={fileInputRef} className="hidden-input" type="file" accept="application/pdf" multiple onChange={processUploadedFiles} /><Button variant="secondary" icon={Sparkles} onClick={startNewScreening} disabled={busy}>Start screening</Button><Button variant="secondary" icon={Upload} onClick={() => fileInputRef.current?.click()} disabled={busy || !jobDescription.trim()}>Upload resumes</Button><Button icon={Sparkles} onClick={reviewCVs} disabled={busy || !candidates.length || !jobDescription.trim()}>Review CVs</Button></div></section>
       <section className="panel jd-panel">
         <div className="panel-head"><div><h2>Job description</h2><p>Resume ranking and feedback use this role description.</p></div></div>
-        <textarea value={jobDescription} onChange={(event) => { setJobDescription(event.target.value); setHasReviewed(false); setCandidateMessages({}); setReviewedMessages({}); setSentMessages({}); }} placeholder="Paste the job title on the first line, then the full job description below." />
+        <JobDescriptionInput value={jobDescription} onCommit={(value) => { setJobDescription(value); setHasReviewed(false); setCandidateMessages({}); setReviewedMessages({}); setSentMessages({}); }} placeholder="Paste the job title on the first line, then the full job description below." />
       </section>
       <section className="panel threshold-panel">
         <div><h2>Shortlist threshold</h2><p>Candidates below the line receive personalised rejection feedback; candidates at or above it receive interview invites.</p></div>
@@ -874,13 +928,10 @@ function CandidateFeedbackPage() {
         };
 
         if (candidate.score < threshold) {
-          const result = await api.feedback(payload);
-          nextMessages[candidate.name] = {
-            type: "feedback",
-            label: "Rejection feedback",
-            subject: `An update on your application for ${candidate.role}`,
-            body: result.feedback,
-          };
+          const draft = { type: "feedback", label: "Rejection feedback", subject: `An update on your application for ${candidate.role}` };
+          // Show the email as it is written rather than after the full completion.
+          const body = await api.streamFeedback(payload, (partial) => setMessages((current) => ({ ...current, [candidate.name]: { ...draft, body: partial } })));
+          nextMessages[candidate.name] = { ...draft, body };
           nextCandidates.push({ ...candidate, status: "Reject" });
         } else {
           const result = await api.invite(payload);
@@ -947,10 +998,10 @@ function CandidateFeedbackPage() {
       <section className="feedback-workbench">
         <aside className="panel feedback-list">
           <div className="feedback-group-title"><span className="status-dot warning-dot" /> Below threshold <small>{below.length} feedback</small></div>
-          {below.map((candidate) => <FeedbackCandidateButton key={candidate.name} candidate={candidate} selected={selected.name === candidate.name} onClick={() => setSelected(candidate)} />)}
+          {below.map((candidate) => <FeedbackCandidateButton key={candidate.name} candidate={candidate} selected={selected.name === candidate.name} onSelect={setSelected} />)}
           <div className="threshold-divider">{threshold}% cut-off</div>
           <div className="feedback-group-title"><span className="status-dot" /> Advancing <small>{advancing.length} interview</small></div>
-          {advancing.map((candidate) => <FeedbackCandidateButton key={candidate.name} candidate={candidate} selected={selected.name === candidate.name} onClick={() => setSelected(candidate)} />)}
+          {advancing.map((candidate) => <FeedbackCandidateButton key={candidate.name} candidate={candidate} selected={selected.name === candidate.name} onSelect={setSelected} />)}
         </aside>
 
         <article className="panel feedback-composer">
@@ -1004,15 +1055,17 @@ function CandidateFeedbackPage() {
   );
 }
 
-function FeedbackCandidateButton({ candidate, selected, onClick }) {
+// Memoised with a stable onSelect so streaming drafts and checkbox ticks only
+// re-render the composer, not every candidate in the list.
+const FeedbackCandidateButton = memo(function FeedbackCandidateButton({ candidate, selected, onSelect }) {
   return (
-    <button className={`feedback-candidate ${selected ? "active" : ""}`} onClick={onClick}>
+    <button className={`feedback-candidate ${selected ? "active" : ""}`} onClick={() => onSelect(candidate)}>
       <span className="avatar">{candidate.name.split(" ").map((word) => word[0]).join("").slice(0, 2)}</span>
       <span className="grow"><strong>{candidate.name}</strong><small>Gap: {candidate.gap}</small></span>
       <Score value={candidate.score} compact />
     </button>
   );
-}
+});
 
 export function CandidatesPage({ onOpenReport, workspace }) {
   const [query, setQuery] = useState("");
@@ -1195,14 +1248,35 @@ function SkillSection({ title, items, tone }) {
 
 export function ReportsPage({ workspace }) {
   const candidates = workspace?.candidates || [];
-  const screened = candidates.filter((candidate) => typeof candidate.score === "number");
-  const shortlistedCandidates = candidates.filter((candidate) => ["Shortlist", "Interview", "Offer"].includes(candidate.status));
-  const averageMatch = screened.length ? Math.round(screened.reduce((total, candidate) => total + Number(candidate.score || 0), 0) / screened.length) : 0;
-  const shortlistRate = screened.length ? Math.round((shortlistedCandidates.length / screened.length) * 100) : 0;
+  // One pass over the pool for every count and percentage the report shows.
+  const { screened, shortlistedCount, interviewCount, offerCount, averageMatch, topMatch, tierCounts } = useMemo(() => {
+    const scored = [];
+    const tiers = MATCH_TIERS.map(() => 0);
+    let shortlisted = 0;
+    let interviews = 0;
+    let offers = 0;
+    let total = 0;
+    let top = 0;
+    for (const candidate of candidates) {
+      if (typeof candidate.score === "number") {
+        scored.push(candidate);
+        const score = Number(candidate.score || 0);
+        total += score;
+        top = Math.max(top, score);
+        tiers[MATCH_TIERS.findIndex(([, , minimum]) => candidate.score >= minimum)] += 1;
+      }
+      if (candidate.status === "Shortlist" || candidate.status === "Interview" || candidate.status === "Offer") shortlisted += 1;
+      if (candidate.status === "Interview") interviews += 1;
+      if (candidate.status === "Offer") offers += 1;
+    }
+    return { screened: scored, shortlistedCount: shortlisted, interviewCount: interviews, offerCount: offers, averageMatch: scored.length ? Math.round(total / scored.length) : 0, topMatch: top, tierCounts: tiers };
+  }, [candidates]);
+  const percentOf = (count, total) => total ? Math.round((count / total) * 100) : 0;
+  const shortlistRate = percentOf(shortlistedCount, screened.length);
   const currentMetrics = [
     ["Candidates screened", String(screened.length), `of ${candidates.length} uploaded`, Users],
     ["Average match", `${averageMatch}%`, "current workspace", Target],
-    ["Shortlist rate", `${shortlistRate}%`, `${shortlistedCandidates.length} shortlisted`, ShieldCheck],
+    ["Shortlist rate", `${shortlistRate}%`, `${shortlistedCount} shortlisted`, ShieldCheck],
     ["Avg time-to-screen", "Not tracked", "Add screening timestamps to calculate", BarChart3],
   ];
   const recruitmentMetrics = [
@@ -1231,16 +1305,16 @@ export function ReportsPage({ workspace }) {
   const toggleMetric = (id) => setSelectedMetricIds((selected) => selected.includes(id) ? selected.filter((item) => item !== id) : [...selected, id]);
   const funnel = [
     ["Uploaded", candidates.length, 100],
-    ["Screened", screened.length, candidates.length ? Math.round((screened.length / candidates.length) * 100) : 0],
-    ["Shortlisted", shortlistedCandidates.length, screened.length ? shortlistRate : 0],
-    ["Interview", candidates.filter((candidate) => candidate.status === "Interview").length, candidates.length ? Math.round((candidates.filter((candidate) => candidate.status === "Interview").length / candidates.length) * 100) : 0],
-    ["Offer", candidates.filter((candidate) => candidate.status === "Offer").length, candidates.length ? Math.round((candidates.filter((candidate) => candidate.status === "Offer").length / candidates.length) * 100) : 0],
+    ["Screened", screened.length, percentOf(screened.length, candidates.length)],
+    ["Shortlisted", shortlistedCount, shortlistRate],
+    ["Interview", interviewCount, percentOf(interviewCount, candidates.length)],
+    ["Offer", offerCount, percentOf(offerCount, candidates.length)],
   ];
   const sources = [
     ["Uploaded CV", candidates.length ? 100 : 0],
   ];
-  const roles = workspace?.job_description ? [[workspace.job_title || getJobTitle(workspace.job_description), "Current workspace", candidates.length, averageMatch, screened.length ? Math.max(...screened.map((candidate) => Number(candidate.score || 0))) : 0]] : [];
-  const distribution = [["Excellent", "80-100", screened.filter((candidate) => candidate.score >= 80).length], ["Good", "65-79", screened.filter((candidate) => candidate.score >= 65 && candidate.score < 80).length], ["Fair", "50-64", screened.filter((candidate) => candidate.score >= 50 && candidate.score < 65).length], ["Limited", "0-49", screened.filter((candidate) => candidate.score < 50).length]];
+  const roles = workspace?.job_description ? [[workspace.job_title || getJobTitle(workspace.job_description), "Current workspace", candidates.length, averageMatch, topMatch]] : [];
+  const distribution = MATCH_TIERS.map(([label, range], index) => [label, range, tierCounts[index]]);
   const distributionMax = Math.max(1, ...distribution.map((item) => item[2]));
   const exportReport = () => downloadTextPdf([
     "TRUEFIT HIRING REPORT",
@@ -33,6 +33,31 @@ async function upload(path, formData) {
   return data;
 }
 
+async function stream(path, payload, onText) {
+  const response = await fetch(`${API_URL}${path}`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(payload),
+  });
+  if (!response.ok) {
+    const data = await response.json().catch(() => ({}));
+    throw new Error(data?.detail || "Request failed");
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let text = "";
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    text += decoder.decode(value, { stream: true });
+    onText(text);
+  }
+  text += decoder.decode();
+  onText(text);
+  return text;
+}
+
 async function download(path, payload) {
   const response = await fetch(`${API_URL}${path}`, {
     method: "POST",
@@ -99,6 +124,12 @@ export const api = {
       method: "POST",
       body: JSON.stringify(payload),
     }),
+  queueBatchEmbeddings: (payload) =>
+    request("/api/matching/batch/embeddings", {
+      method: "POST",
+      body: JSON.stringify(payload),
+    }),
+  batchEmbeddingsStatus: (batchId) => request(`/api/matching/batch/embeddings/${encodeURIComponent(batchId)}`),
   analyseMatch: (payload) =>
     request("/api/matching/analysis", {
       method: "POST",
@@ -109,11 +140,23 @@ export const api = {
     formData.append("file", file);
     return upload("/api/matching/resume/extract", formData);
   },
+  extractResumes: (files) => {
+    const formData = new FormData();
+    files.forEach((file) => formData.append("files", file));
+    return upload("/api/matching/resume/extract/batch", formData);
+  },
   feedback: (payload) =>
     request("/api/matching/feedback", {
       method: "POST",
       body: JSON.stringify(payload),
     }),
+  feedbackBatch: (payload) =>
+    request("/api/matching/feedback/batch", {
+      method: "POST",
+      body: JSON.stringify(payload),
+    }),
+  streamFeedback: (payload, onText) => stream("/api/matching/feedback/stream", payload, onText),
+  streamImprovements: (payload, onText) => stream("/api/matching/improvements/stream", payload, onText),
   invite: (payload) =>
     request("/api/matching/invite", {
       method: "POST",
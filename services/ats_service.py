@@ -4,22 +4,35 @@ Framework-neutral access to the existing matching and document logic. It does
 not depend on a frontend framework.
 """
 
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
 
 from ats_engine import (
     ATSConfigurationError,
     clean_and_structure_resume,
+    clean_resumes,
+    collect_embedding_batch,
+    cosine_score,
     extract_candidate_name,
     extract_text_from_pdf,
+    extract_texts_from_pdfs,
     generate_compliant_feedback,
+    generate_feedback_batch,
     generate_resume_improvement_suggestions,
+    get_cache_stats,
     get_embedding,
+    get_embeddings,
     match_profile_to_jd,
     optimize_cv_for_jd,
     rank_candidates,
+    resume_embedding_chunks,
+    stream_compliant_feedback,
+    stream_resume_improvement_suggestions,
+    submit_embedding_batch,
     validate_resume_document,
 )
-from services.matching_analysis import analyse_role_fit
+from services.matching_analysis import analyse_role_fit, extract_job_requirements
 
 
 def extract_resume_text(uploaded_file) -> str:
@@ -27,16 +40,137 @@ def extract_resume_text(uploaded_file) -> str:
     return extract_text_from_pdf(uploaded_file)
 
 
+_CLEANING_ERROR_PREFIXES = ("Error:", "OpenAI API Error", "Unexpected error")
+
+
+def extract_resume_texts(files: Iterable[Tuple[str, bytes]], clean: bool = False) -> List[Dict[str, str]]:
+    """
+    Extract text from several (filename, PDF bytes) uploads in parallel.
+
+    With clean=True the extracted texts are also cleaned and section-tagged
+    concurrently, adding 'cleaned_text' (or 'clean_error') to each result.
+    """
+    results = extract_texts_from_pdfs(files)
+    if not clean:
+        return results
+
+    extracted = [result for result in results if "text" in result]
+    for result, cleaned in zip(extracted, clean_resumes([result["text"] for result in extracted])):
+        if cleaned.startswith(_CLEANING_ERROR_PREFIXES):
+            result["clean_error"] = cleaned
+        else:
+            result["cleaned_text"] = cleaned
+    return results
+
+
+# Pools larger than this only embed the resumes with the most requirement evidence.
+PREFILTER_MIN_POOL = 50
+PREFILTER_MIN_KEEP = 20
+PREFILTER_KEEP_FRACTION = 0.3
+
+
+def _prefilter_by_evidence(
+    candidates_data: List[Dict[str, str]],
+    evidence: Dict[str, int],
+) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+    """Split a large pool into (candidates to embed, lowest-evidence remainder)."""
+    if len(candidates_data) <= PREFILTER_MIN_POOL or not any(evidence.values()):
+        return candidates_data, []
+    keep = max(PREFILTER_MIN_KEEP, int(np.ceil(len(candidates_data) * PREFILTER_KEEP_FRACTION)))
+    scores = np.fromiter((evidence.get(candidate.get("resume", ""), 0) for candidate in candidates_data), dtype=np.float64, count=len(candidates_data))
+    kept = np.zeros(len(candidates_data), dtype=bool)
+    kept[np.argsort(-scores, kind="stable")[:keep]] = True
+    return (
+        [candidate for candidate, flag in zip(candidates_data, kept) if flag],
+        [candidate for candidate, flag in zip(candidates_data, kept) if not flag],
+    )
+
+
+def _split_by_evidence(job_description: str, candidates_data: List[Dict[str, str]]) -> Tuple:
+    """Return (requirements, analyses by resume, candidates to embed, prefiltered remainder)."""
+    requirements = extract_job_requirements(job_description)
+    valid = [candidate for candidate in candidates_data if isinstance(candidate, dict) and "resume" in candidate and "name" in candidate]
+    # Keyed by resume text so duplicate uploads are analysed once.
+    analyses_by_resume: Dict[str, Dict] = {}
+    for candidate in valid:
+        resume = candidate["resume"]
+        if resume not in analyses_by_resume:
+            analyses_by_resume[resume] = analyse_role_fit(job_description, resume, requirements)
+
+    to_embed, skipped = _prefilter_by_evidence(
+        valid or candidates_data,
+        {resume: analysis["evidence_score"] for resume, analysis in analyses_by_resume.items()},
+    )
+    return requirements, analyses_by_resume, to_embed, skipped
+
+
 def rank_resumes(job_description: str, candidates_data: List[Dict[str, str]]) -> List[Dict]:
-    """Rank candidate resumes against a job description."""
-    ranked = rank_candidates(job_description, candidates_data)
-    for candidate in ranked:
-        analysis = analyse_role_fit(job_description, candidate.get("resume", ""))
-        semantic_score = max(0.0, min(1.0, float(candidate.get("score", 0))))
+    """
+    Rank candidate resumes against a job description.
+
+    Requirement evidence is matched locally first. For pools larger than
+    PREFILTER_MIN_POOL, only the strongest share is embedded; the rest are
+    returned with a zero semantic score and 'prefiltered' set.
+    """
+    requirements, analyses_by_resume, to_embed, skipped = _split_by_evidence(job_description, candidates_data)
+    ranked = rank_candidates(job_description, to_embed)
+    if not ranked:
+        if not skipped:
+            return []
+        # Nothing could be embedded, so the kept subset is scored on evidence
+        # alone too; it still outranks the weaker prefiltered remainder.
+        ranked = [
+            {
+                "name": candidate["name"],
+                "score": 0.0,
+                "resume": candidate["resume"],
+                "candidate_name": candidate.get("candidate_name", candidate["name"]),
+            }
+            for candidate in to_embed
+        ]
+    ranked.extend(
+        {
+            "name": candidate["name"],
+            "score": 0.0,
+            "resume": candidate["resume"],
+            "candidate_name": candidate.get("candidate_name", candidate["name"]),
+            "prefiltered": True,
+        }
+        for candidate in skipped
+    )
+
+    analyses = [
+        analyses_by_resume.get(candidate.get("resume", "")) or analyse_role_fit(job_description, candidate.get("resume", ""), requirements)
+        for candidate in ranked
+    ]
+    count = len(ranked)
+    semantic_scores = np.clip(np.fromiter((float(candidate.get("score", 0)) for candidate in ranked), dtype=np.float64, count=count), 0.0, 1.0)
+    evidence_scores = np.fromiter((analysis["evidence_score"] for analysis in analyses), dtype=np.float64, count=count)
+    blended_scores = np.round((semantic_scores * 0.35) + ((evidence_scores / 100) * 0.65), 4)
+
+    for candidate, analysis, semantic_score, score in zip(ranked, analyses, semantic_scores, blended_scores):
         candidate.update(analysis)
-        candidate["semantic_score"] = semantic_score
-        candidate["score"] = round((semantic_score * 0.35) + ((analysis["evidence_score"] / 100) * 0.65), 4)
-    return sorted(ranked, key=lambda item: item["score"], reverse=True)
+        candidate["semantic_score"] = float(semantic_score)
+        candidate["score"] = float(score)
+    return [ranked[index] for index in np.argsort(-blended_scores, kind="stable")]
+
+
+def queue_ranking_embeddings(job_description: str, candidates_data: List[Dict[str, str]]) -> Dict:
+    """
+    Embed a large pool offline via the Batch API ahead of rank_resumes.
+
+    Only the candidates rank_resumes would embed after its evidence
+    prefilter are queued, chunked the same way.
+    """
+    to_embed = _split_by_evidence(job_description, candidates_data)[2]
+    resumes = [candidate.get("resume", "") for candidate in to_embed if isinstance(candidate, dict) and "resume" in candidate and "name" in candidate]
+    chunks = [chunk for resume_chunks in resume_embedding_chunks(resumes) for chunk in resume_chunks]
+    return submit_embedding_batch([job_description] + chunks)
+
+
+def collect_ranking_embeddings(batch_id: str) -> Dict:
+    """Report a queued embedding batch and cache its vectors when complete."""
+    return collect_embedding_batch(batch_id)
 
 
 def generate_candidate_feedback(
@@ -48,26 +182,93 @@ def generate_candidate_feedback(
     return generate_compliant_feedback(job_description, candidate_resume, candidate_name)
 
 
-def generate_candidate_improvements(job_description: str, candidate_resume: str) -> str:
-    """Generate candidate-facing resume improvement suggestions."""
+def generate_candidate_feedback_batch(
+    job_description: str,
+    candidates: List[Dict[str, str]],
+    include_improvements: bool = False,
+) -> List[Dict[str, str]]:
+    """Generate feedback (and optionally improvements) for several candidates at once."""
+    return generate_feedback_batch(job_description, candidates, include_improvements)
+
+
+def stream_candidate_feedback(
+    job_description: str,
+    candidate_resume: str,
+    candidate_name: Optional[str] = None,
+) -> Iterator[str]:
+    """Stream compliant candidate feedback as it is generated."""
+    return stream_compliant_feedback(job_description, candidate_resume, candidate_name)
+
+
+LOW_OVERLAP_NOTICE = "Very low keyword overlap with this role, so no AI suggestions were drafted."
+
+
+def _low_overlap_improvements(job_description: str, candidate_resume: str) -> Optional[str]:
+    """Local advice when the resume shows none of the JD's requirements, else None."""
+    fit = analyse_role_fit(job_description, candidate_resume)
+    if not fit["requirements"] or fit["matched_requirements"]:
+        return None
+    lines = [LOW_OVERLAP_NOTICE, ""]
+    lines.extend(f"- {item['requirement']}: {item['advice']}" for item in fit["suggestions"])
+    return "\n".join(lines)
+
+
+def generate_candidate_improvements(job_description: str, candidate_resume: str, force: bool = False) -> str:
+    """
+    Generate candidate-facing resume improvement suggestions.
+
+    A resume with no lexical evidence for any JD requirement gets local
+    advice instead of an LLM call unless force is set.
+    """
+    if not force:
+        local_advice = _low_overlap_improvements(job_description, candidate_resume)
+        if local_advice is not None:
+            return local_advice
     return generate_resume_improvement_suggestions(job_description, candidate_resume)
 
 
+def stream_candidate_improvements(job_description: str, candidate_resume: str, force: bool = False) -> Iterator[str]:
+    """Stream candidate-facing improvement suggestions, with the same low-overlap short circuit."""
+    if not force:
+        local_advice = _low_overlap_improvements(job_description, candidate_resume)
+        if local_advice is not None:
+            return iter([local_advice])
+    return stream_resume_improvement_suggestions(job_description, candidate_resume)
+
+
 __all__ = [
     "ATSConfigurationError",
+    "LOW_OVERLAP_NOTICE",
     "clean_and_structure_resume",
+    "clean_resumes",
+    "collect_embedding_batch",
+    "collect_ranking_embeddings",
+    "cosine_score",
     "extract_candidate_name",
     "extract_resume_text",
+    "extract_resume_texts",
     "extract_text_from_pdf",
+    "extract_texts_from_pdfs",
     "generate_candidate_feedback",
+    "generate_candidate_feedback_batch",
     "generate_candidate_improvements",
     "generate_compliant_feedback",
+    "generate_feedback_batch",
     "generate_resume_improvement_suggestions",
+    "get_cache_stats",
     "get_embedding",
+    "get_embeddings",
     "match_profile_to_jd",
     "optimize_cv_for_jd",
+    "queue_ranking_embeddings",
     "rank_candidates",
     "rank_resumes",
+    "resume_embedding_chunks",
+    "stream_candidate_feedback",
+    "stream_candidate_improvements",
+    "stream_compliant_feedback",
+    "stream_resume_improvement_suggestions",
+    "submit_embedding_batch",
     "analyse_role_fit",
     "validate_resume_document",
 ]
@@ -2,16 +2,17 @@
 
 import re
 from collections import Counter
-from typing import Dict, List
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Set, Tuple
 
 
-STOPWORDS = {
+STOPWORDS = frozenset({
     "about", "after", "also", "and", "are", "based", "been", "being", "build", "company",
     "advisor", "candidate", "excellent", "experience", "from", "have", "into", "job", "junior",
     "looking", "manager", "must", "our", "required", "role", "senior", "specialist", "strong", "team",
     "that", "the", "their", "them", "they", "this", "using", "what", "when",
     "where", "which", "will", "with", "work", "working", "years", "you", "your",
-}
+})
 
 KNOWN_REQUIREMENTS = [
     "account management", "accounts payable", "accounts receivable", "active listening", "agile",
@@ -27,21 +28,58 @@ KNOWN_REQUIREMENTS = [
     "user research", "wcag", "workforce planning",
 ]
 
+_BULLET_LINE = re.compile(r"^\s*[-*\u2022]")
+_REQUIREMENT_LINE = re.compile(r"\b(required|requirements|experience|knowledge|proficien|skilled)\b", re.I)
+_KEYWORD_TOKEN = re.compile(r"\b[a-zA-Z][a-zA-Z0-9+#.]{2,}\b")
+
+
+@lru_cache(maxsize=128)
+def _terms_pattern(terms: Tuple[str, ...]) -> "re.Pattern[str]":
+    """
+    Compile one zero-width alternation that reports every term in a single pass.
+
+    The lookahead lets overlapping terms match, such as "content marketing"
+    inside "content marketing strategy". Longer terms are tried first, and
+    _find_terms checks terms that prefix another term separately.
+    """
+    ordered = sorted(set(terms), key=len, reverse=True)
+    return re.compile(r"(?=\b(" + "|".join(re.escape(term) for term in ordered) + r")\b)")
+
+
+def _find_terms(terms: Sequence[str], text: str) -> Set[str]:
+    """Return the subset of terms that occur in text as whole words."""
+    terms = tuple(terms)
+    if not terms:
+        return set()
+    found = set(_terms_pattern(terms).findall(text))
+    for term in terms:
+        # A term hidden behind a longer one at the same position needs its own check.
+        if term not in found and any(other != term and other.startswith(term) for other in terms):
+            if re.search(rf"\b{re.escape(term)}\b", text):
+                found.add(term)
+    return found
+
+
+# Any run of characters outside the term alphabet, whitespace included,
+# collapses to one space in a single substitution.
+_NON_TERM_RUN = re.compile(r"[^a-z0-9+#./-]+")
+
 
 def _clean(value: str) -> str:
-    return re.sub(r"\s+", " ", re.sub(r"[^a-z0-9+#./ -]", " ", value.lower())).strip()
+    return _NON_TERM_RUN.sub(" ", value.lower()).strip()
 
 
 def extract_job_requirements(job_description: str, limit: int = 16) -> List[str]:
     """Extract explicit domain terms plus useful keywords from an arbitrary JD."""
     clean_jd = _clean(job_description)
-    found = [term for term in KNOWN_REQUIREMENTS if re.search(rf"\b{re.escape(term)}\b", clean_jd)]
+    present = _find_terms(KNOWN_REQUIREMENTS, clean_jd)
+    found = [term for term in KNOWN_REQUIREMENTS if term in present]
 
     bullet_text = " ".join(
         line for line in job_description.splitlines()
-        if re.match(r"^\s*[-*\u2022]", line) or re.search(r"\b(required|requirements|experience|knowledge|proficien|skilled)\b", line, re.I)
+        if _BULLET_LINE.match(line) or _REQUIREMENT_LINE.search(line)
     )
-    tokens = re.findall(r"\b[a-zA-Z][a-zA-Z0-9+#.]{2,}\b", bullet_text or job_description)
+    tokens = _KEYWORD_TOKEN.findall(bullet_text or job_description)
     counts = Counter(token.lower() for token in tokens if token.lower() not in STOPWORDS)
     for token, _ in counts.most_common(30):
         if token not in found and not any(token in phrase.split() for phrase in found) and len(token) > 3:
@@ -51,10 +89,13 @@ def extract_job_requirements(job_description: str, limit: int = 16) -> List[str]
     return found[:limit]
 
 
-def analyse_role_fit(job_description: str, candidate_text: str) -> Dict:
-    requirements = extract_job_requirements(job_description)
+def analyse_role_fit(job_description: str, candidate_text: str, requirements: Optional[List[str]] = None) -> Dict:
+    """Score a candidate against JD requirements; pass requirements to reuse them across candidates."""
+    if requirements is None:
+        requirements = extract_job_requirements(job_description)
     resume = _clean(candidate_text)
-    matched = [item for item in requirements if re.search(rf"\b{re.escape(item)}\b", resume)]
+    present = _find_terms(requirements, resume)
+    matched = [item for item in requirements if item in present]
     missing = [item for item in requirements if item not in matched]
     evidence_score = round((len(matched) / len(requirements)) * 100) if requirements else 0
     suggestions = [
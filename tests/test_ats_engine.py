@@ -0,0 +1,682 @@
+"""Unit tests for ATS engine caching and scoring helpers."""
+
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+import ats_cache
+import ats_engine
+
+
+def _chat_response(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def _use_temporary_cache_db(test_case):
+    temp_dir = tempfile.TemporaryDirectory()
+    test_case.addCleanup(temp_dir.cleanup)
+    db_patch = patch("ats_cache.CACHE_DB_FILE", os.path.join(temp_dir.name, "cache.sqlite3"))
+    db_patch.start()
+    test_case.addCleanup(db_patch.stop)
+
+
+class PdfParsingTests(unittest.TestCase):
+    def test_pymupdf_is_preferred_when_installed(self):
+        document = MagicMock(page_count=2)
+        document.__enter__.return_value = document
+        document.__iter__.return_value = iter([SimpleNamespace(get_text=lambda: "Page one"), SimpleNamespace(get_text=lambda: "")])
+        fake_pymupdf = SimpleNamespace(open=MagicMock(return_value=document))
+        with patch.object(ats_engine, "_pymupdf", return_value=fake_pymupdf):
+            text = ats_engine._parse_pdf_bytes(b"%PDF-1.4")
+
+        self.assertEqual(text, "Page one")
+        fake_pymupdf.open.assert_called_once_with(stream=b"%PDF-1.4", filetype="pdf")
+
+    def test_pypdf_layout_mode_is_only_tried_for_near_empty_text(self):
+        def page(plain, layout):
+            texts = {"plain": plain, "layout": layout}
+            return SimpleNamespace(extract_text=MagicMock(side_effect=lambda extraction_mode: texts[extraction_mode]))
+
+        sparse = page("", "Jane   Doe")
+        dense = page("Experience " * 30, "")
+        with patch.object(ats_engine, "_pymupdf", return_value=None), patch("pypdf.PdfReader") as reader:
+            reader.return_value.pages = [sparse]
+            self.assertEqual(ats_engine._parse_pdf_bytes(b"%PDF-1.4"), "Jane   Doe")
+            reader.return_value.pages = [dense]
+            ats_engine._parse_pdf_bytes(b"%PDF-1.4")
+
+        dense.extract_text.assert_called_once_with(extraction_mode="plain")
+
+    def test_pages_after_the_character_limit_are_not_parsed(self):
+        parsed = []
+
+        def pages():
+            for number in range(5):
+                parsed.append(number)
+                yield "x" * 40
+
+        with patch.object(ats_engine, "PDF_TEXT_CHAR_LIMIT", 100):
+            text = ats_engine._join_page_texts(pages())
+
+        self.assertEqual(parsed, [0, 1, 2])
+        self.assertEqual(text.count("\n"), 2)
+
+
+class PdfBatchExtractionTests(unittest.TestCase):
+    def setUp(self):
+        _use_temporary_cache_db(self)
+        ats_engine._extract_cache.clear()
+
+    def test_single_file_batch_is_parsed_without_the_worker_pool(self):
+        with patch.object(ats_engine, "_get_pdf_pool") as get_pool, \
+                patch.object(ats_engine, "_parse_pdf_bytes", return_value="Jane Doe"):
+            results = ats_engine.extract_texts_from_pdfs([("a.pdf", b"%PDF-a"), ("copy.pdf", b"%PDF-a")])
+
+        get_pool.assert_not_called()
+        self.assertEqual(results, [{"filename": "a.pdf", "text": "Jane Doe"}, {"filename": "copy.pdf", "text": "Jane Doe"}])
+
+
+class ResumeCleaningCacheTests(unittest.TestCase):
+    def setUp(self):
+        _use_temporary_cache_db(self)
+        ats_engine._clean_cache.clear()
+
+    def test_identical_resume_text_is_cleaned_once(self):
+        fake_client = MagicMock()
+        fake_client.chat.completions.create.return_value = _chat_response("[SUMMARY] Engineer")
+        with patch.object(ats_engine, "client", fake_client):
+            first = ats_engine.clean_and_structure_resume("Jane Doe\nEngineer")
+            second = ats_engine.clean_and_structure_resume("Jane Doe\nEngineer")
+
+        self.assertEqual(first, second)
+        self.assertEqual(fake_client.chat.completions.create.call_count, 1)
+        self.assertEqual(ats_engine.get_cache_stats()["resume_cleaning"]["hits"], 1)
+
+    def test_failed_cleaning_is_not_cached(self):
+        fake_client = MagicMock()
+        fake_client.chat.completions.create.side_effect = [RuntimeError("timeout"), _chat_response("[SKILLS] SQL")]
+        with patch.object(ats_engine, "client", fake_client):
+            failed = ats_engine.clean_and_structure_resume("SQL analyst")
+            retried = ats_engine.clean_and_structure_resume("SQL analyst")
+
+        self.assertTrue(failed.startswith("Unexpected error"))
+        self.assertEqual(retried, "[SKILLS] SQL")
+
+    def test_already_tagged_text_skips_the_cleaning_call(self):
+        tagged = "[SUMMARY]\nHR advisor\n[EXPERIENCE]\nPeople team, 2019-2024"
+        fake_client = MagicMock()
+        with patch.object(ats_engine, "client", fake_client):
+            self.assertEqual(ats_engine.clean_and_structure_resume(tagged), tagged)
+
+        fake_client.chat.completions.create.assert_not_called()
+
+    def test_short_resume_with_plain_headings_is_tagged_locally(self):
+        resume = "Jane Doe\njane@example.com\nSummary\nHR advisor\nExperience:\nPeople team\nEducation\nBA\nSkills\nPayroll"
+        fake_client = MagicMock()
+        with patch.object(ats_engine, "client", fake_client):
+            cleaned = ats_engine.clean_and_structure_resume(resume)
+            ats_engine.clean_and_structure_resume("Jane Doe\nSummary\nHR advisor\nSkills\nPayroll")
+
+        self.assertEqual(cleaned, "[SUMMARY]\nHR advisor\n\n[EXPERIENCE]\nPeople team\n\n[EDUCATION]\nBA\n\n[SKILLS]\nPayroll")
+        self.assertEqual(fake_client.chat.completions.create.call_count, 1)
+
+    def test_contact_details_are_stripped_before_the_cleaning_call(self):
+        fake_client = MagicMock()
+        fake_client.chat.completions.create.return_value = _chat_response("[EXPERIENCE] Analyst")
+        resume = "Jane Doe | jane@example.com | +44 7700 900123\nhttps://linkedin.com/in/jane\nAnalyst, 2019 - 2024\nPage 1 of 2"
+        with patch.object(ats_engine, "client", fake_client):
+            ats_engine.clean_and_structure_resume(resume)
+
+        sent = fake_client.chat.completions.create.call_args.kwargs["messages"][1]["content"]
+        self.assertNotIn("example.com", sent)
+        self.assertNotIn("7700", sent)
+        self.assertNotIn("linkedin", sent)
+        self.assertNotIn("Page 1", sent)
+        self.assertIn("Analyst, 2019 - 2024", sent)
+
+    def test_dates_and_figures_survive_phone_stripping(self):
+        for line in ["Team of 12 (2019 - 2021)", "Analyst 01.2019 - 06.2024", "BSc (2015 - 2019) 3.8 GPA", "ISO 27001 2019-2024"]:
+            self.assertEqual(ats_engine._strip_resume_noise(line), line)
+
+    def test_international_and_trunk_phone_numbers_are_stripped(self):
+        for phone in ["+44 7700 900123", "+1-415-555-0132", "(020) 7946 0958", "07700 900123"]:
+            self.assertEqual(ats_engine._strip_resume_noise(f"Call {phone} today"), "Call  today")
+
+    def test_duplicate_uploads_are_cleaned_once(self):
+        fake_client = MagicMock()
+        fake_client.chat.completions.create.return_value = _chat_response("[SKILLS] Excel")
+        with patch.object(ats_engine, "client", fake_client):
+            cleaned = ats_engine.clean_resumes(["Accountant", "Accountant", "Accountant"])
+
+        self.assertEqual(cleaned, ["[SKILLS] Excel"] * 3)
+        self.assertEqual(fake_client.chat.completions.create.call_count, 1)
+
+    def test_cleaned_resume_survives_losing_the_memory_cache(self):
+        fake_client = MagicMock()
+        fake_client.chat.completions.create.return_value = _chat_response("[EXPERIENCE] Nurse")
+        with patch.object(ats_engine, "client", fake_client):
+            ats_engine.clean_and_structure_resume("Registered nurse")
+            # A fresh cache over the same table stands in for a server restart.
+            restarted = ats_cache.ResponseCache(store=ats_engine._clean_cache.store)
+            with patch.object(ats_engine, "_clean_cache", restarted):
+                restored = ats_engine.clean_and_structure_resume("Registered nurse")
+
+        self.assertEqual(restored, "[EXPERIENCE] Nurse")
+        self.assertEqual(fake_client.chat.completions.create.call_count, 1)
+
+
+class ResumeValidationCacheTests(unittest.TestCase):
+    def setUp(self):
+        _use_temporary_cache_db(self)
+        ats_engine._validation_cache.clear()
+
+    def test_verdict_is_reused_for_the_same_document(self):
+        fake_client = MagicMock()
+        fake_client.chat.completions.create.return_value = _chat_response("NO")
+        with patch.object(ats_engine, "client", fake_client):
+            first = ats_engine.validate_resume_document("Course outline: skills covered in week one")
+            second = ats_engine.validate_resume_document("Course outline: skills covered in week one")
+
+        self.assertFalse(first[0])
+        self.assertEqual(first, second)
+        self.assertEqual(fake_client.chat.completions.create.call_count, 1)
+
+    def test_failed_validation_lets_the_document_through_uncached(self):
+        fake_client = MagicMock()
+        fake_client.chat.completions.create.side_effect = RuntimeError("timeout")
+        with patch.object(ats_engine, "client", fake_client):
+            self.assertEqual(ats_engine.validate_resume_document("Jane Doe\nExperience"), (True, ""))
+
+        self.assertEqual(ats_engine.get_cache_stats()["resume_validation"]["entries"], 0)
+
+    def test_text_with_several_resume_sections_is_accepted_locally(self):
+        fake_client = MagicMock()
+        with patch.object(ats_engine, "client", fake_client):
+            verdict = ats_engine.validate_resume_document("SUMMARY\nAnalyst\nEXPERIENCE\nAcme\nEducation\nBSc")
+
+        self.assertEqual(verdict, (True, ""))
+        fake_client.chat.completions.create.assert_not_called()
+
+    def test_job_description_naming_resume_sections_goes_to_the_llm(self):
+        job_description = (
+            "Senior Data Analyst\n"
+            "We want someone whose experience, skills and education show strong SQL.\n"
+            "Responsibilities:\nBuild dashboards\n"
+            "Experience:\n5+ years in analytics\n"
+            "Skills:\nSQL, Python\n"
+            "Qualifications:\nBSc in a quantitative field\n"
+        )
+        fake_client = MagicMock()
+        fake_client.chat.completions.create.return_value = _chat_response("NO")
+        with patch.object(ats_engine, "client", fake_client):
+            is_valid, _ = ats_engine.validate_resume_document(job_description)
+
+        self.assertFalse(is_valid)
+        self.assertEqual(fake_client.chat.completions.create.call_count, 1)
+
+    def test_section_words_in_prose_go_to_the_llm(self):
+        cover_letter = "Dear hiring manager,\nMy experience, skills and education in analytics fit this role well. " * 3
+        fake_client = MagicMock()
+        fake_client.chat.completions.create.return_value = _chat_response("NO")
+        with patch.object(ats_engine, "client", fake_client):
+            is_valid, _ = ats_engine.validate_resume_document(cover_letter)
+
+        self.assertFalse(is_valid)
+        self.assertEqual(fake_client.chat.completions.create.call_count, 1)
+
+    def test_longer_text_without_english_section_words_goes_to_the_llm(self):
+        resume = "Jana Nováková\nPRACOVNÍ ZKUŠENOSTI\nAnalytička dat, Acme s.r.o., 2019–2024\n" * 4
+        fake_client = MagicMock()
+        fake_client.chat.completions.create.return_value = _chat_response("YES")
+        with patch.object(ats_engine, "client", fake_client):
+            verdict = ats_engine.validate_resume_document(resume)
+
+        self.assertEqual(verdict, (True, ""))
+        self.assertEqual(fake_client.chat.completions.create.call_count, 1)
+
+    def test_short_text_without_resume_sections_is_rejected_locally(self):
+        fake_client = MagicMock()
+        with patch.object(ats_engine, "client", fake_client):
+            is_valid, message = ats_engine.validate_resume_document("Quarterly sales invoice")
+
+        self.assertFalse(is_valid)
+        self.assertTrue(message)
+        fake_client.chat.completions.create.assert_not_called()
+
+
+class ProfileMatchCacheTests(unittest.TestCase):
+    def setUp(self):
+        ats_engine._profile_match_cache.clear()
+        ats_engine._cv_optimization_cache.clear()
+
+    def test_repeated_profile_match_skips_embeddings_and_analysis(self):
+        fake_client = MagicMock()
+        fake_client.chat.completions.create.return_value = _chat_response("**Matching Strengths:**")
+        profile = {"full_name": "Sam Lee", "professional_summary": "Data analyst"}
+        with patch.object(ats_engine, "client", fake_client), \
+                patch.object(ats_engine, "get_embeddings", return_value=[[1.0, 0.0], [1.0, 0.0]]) as embed:
+            first = ats_engine.match_profile_to_jd(profile, [], {}, [], "Data analyst role")
+            first["match_score"] = -1
+            second = ats_engine.match_profile_to_jd(profile, [], {}, [], "Data analyst role")
+
+        self.assertAlmostEqual(second["match_score"], 1.0)
+        # Profile and JD go out in one embeddings request.
+        self.assertEqual(embed.call_count, 1)
+        self.assertEqual(len(embed.call_args.args[0]), 2)
+        self.assertEqual(fake_client.chat.completions.create.call_count, 1)
+
+    def test_analysis_is_drafted_while_embedding(self):
+        # Both requests must be in flight at once for the barrier to release.
+        barrier = threading.Barrier(2, timeout=5)
+
+        def embed(texts):
+            barrier.wait()
+            return [[1.0, 0.0], [1.0, 0.0]]
+
+        def analyse(**kwargs):
+            barrier.wait()
+            return _chat_response("**Matching Strengths:**")
+
+        fake_client = MagicMock()
+        fake_client.chat.completions.create.side_effect = analyse
+        with patch.object(ats_engine, "client", fake_client), patch.object(ats_engine, "get_embeddings", side_effect=embed):
+            result = ats_engine.match_profile_to_jd({"full_name": "Sam Lee"}, [], {}, [], "Analyst role")
+
+        self.assertEqual(result["analysis"], "**Matching Strengths:**")
+        self.assertAlmostEqual(result["match_score"], 1.0)
+
+    def test_failed_embeddings_do_not_wait_for_the_analysis(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def slow_analysis(**kwargs):
+            release.wait(5)
+            return _chat_response("late")
+
+        fake_client = MagicMock()
+        fake_client.chat.completions.create.side_effect = slow_analysis
+        with patch.object(ats_engine, "client", fake_client), patch.object(ats_engine, "get_embeddings", return_value=[None, None]):
+            result = ats_engine.match_profile_to_jd({"full_name": "Sam Lee"}, [], {}, [], "Analyst role")
+
+        self.assertFalse(release.is_set())
+        self.assertEqual(result["match_score"], 0.0)
+
+    def test_failed_cv_optimization_is_not_cached(self):
+        fake_client = MagicMock()
+        fake_client.chat.completions.create.side_effect = [RuntimeError("timeout"), _chat_response("OPTIMIZED_SUMMARY:")]
+        with patch.object(ats_engine, "client", fake_client):
+            failed = ats_engine.optimize_cv_for_jd("Profile", "JD", "Experience")
+            retried = ats_engine.optimize_cv_for_jd("Profile", "JD", "Experience")
+            cached = ats_engine.optimize_cv_for_jd("Profile", "JD", "Experience")
+
+        self.assertTrue(failed.startswith("Error optimizing CV"))
+        self.assertEqual(retried, cached)
+        self.assertEqual(fake_client.chat.completions.create.call_count, 2)
+
+
+class FeedbackStreamingTests(unittest.TestCase):
+    def setUp(self):
+        ats_engine._feedback_cache.clear()
+
+    def test_streamed_feedback_is_cached_for_the_blocking_call(self):
+        def stream_chunk(text):
+            return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+        fake_client = MagicMock()
+        fake_client.chat.completions.create.return_value = iter([stream_chunk("Dear Sam, "), stream_chunk(None), stream_chunk("thank you.")])
+        with patch.object(ats_engine, "client", fake_client), patch.object(ats_engine, "get_embedding", return_value=[1.0, 0.0]):
+            streamed = list(ats_engine.stream_compliant_feedback("Analyst", "Resume", "Sam"))
+            blocking = ats_engine.generate_compliant_feedback("Analyst", "Resume", "Sam")
+
+        self.assertEqual(streamed, ["Dear Sam, ", "thank you."])
+        self.assertEqual(blocking, "Dear Sam, thank you.")
+        self.assertTrue(fake_client.chat.completions.create.call_args.kwargs["stream"])
+        self.assertEqual(fake_client.chat.completions.create.call_count, 1)
+
+
+class SettingsTests(unittest.TestCase):
+    def test_invalid_integer_settings_fall_back_to_the_default(self):
+        for value in ["", "abc", "2.5"]:
+            with patch.dict(os.environ, {"ATS_LLM_CONCURRENCY": value}), warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                self.assertEqual(ats_engine._positive_int_setting("ATS_LLM_CONCURRENCY", 8), 8)
+        with patch.dict(os.environ, {"ATS_LLM_CONCURRENCY": "0"}):
+            self.assertEqual(ats_engine._positive_int_setting("ATS_LLM_CONCURRENCY", 8), 1)
+
+
+class FeedbackBatchTests(unittest.TestCase):
+    def test_feedback_and_improvements_are_drafted_concurrently(self):
+        # Both drafts must be in flight at once for the barrier to release.
+        barrier = threading.Barrier(2, timeout=5)
+
+        def draft(label):
+            def call(*args):
+                barrier.wait()
+                return label
+            return call
+
+        with patch("ats_engine.generate_compliant_feedback", side_effect=draft("feedback")), \
+                patch("ats_engine.generate_resume_improvement_suggestions", side_effect=draft("improvements")):
+            drafts = ats_engine.generate_feedback_batch("JD", [{"name": "Ada", "resume": "resume"}], include_improvements=True)
+
+        self.assertEqual(drafts, [{"feedback": "feedback", "improvements": "improvements"}])
+
+
+class PackedFeedbackTests(unittest.TestCase):
+    def setUp(self):
+        ats_engine._feedback_cache.clear()
+
+    def _draft(self, reply):
+        fake_client = MagicMock()
+        fake_client.chat.completions.create.side_effect = [_chat_response(reply)] + [_chat_response(f"Single {index}") for index in range(3)]
+        candidates = [{"name": name, "resume": f"{name} resume"} for name in ["Ada", "Grace", "Alan"]]
+        with patch.object(ats_engine, "client", fake_client), patch.object(ats_engine, "get_embedding", return_value=[1.0, 0.0]), \
+                patch.object(ats_engine, "FEEDBACK_PACK_SIZE", 3):
+            drafts = ats_engine.generate_feedback_batch("Analyst", candidates)
+        return [draft["feedback"] for draft in drafts], fake_client.chat.completions.create
+
+    def test_group_is_drafted_in_one_json_request(self):
+        feedback, create = self._draft('{"feedback": ["Dear Ada", "Dear Grace", "Dear Alan"]}')
+
+        self.assertEqual(feedback, ["Dear Ada", "Dear Grace", "Dear Alan"])
+        self.assertEqual(create.call_count, 1)
+        self.assertEqual(create.call_args.kwargs["response_format"], {"type": "json_object"})
+
+    def test_malformed_packed_reply_falls_back_to_single_requests(self):
+        feedback, create = self._draft('{"feedback": ["Dear Ada"]}')
+
+        # Fallbacks run concurrently, so replies may land in any order.
+        self.assertEqual(sorted(feedback), ["Single 0", "Single 1", "Single 2"])
+        self.assertEqual(create.call_count, 4)
+
+    def test_fallback_drafts_run_concurrently(self):
+        # All three fallbacks must be in flight at once for the barrier to release.
+        barrier = threading.Barrier(3, timeout=5)
+
+        def draft(job_description, resume, name):
+            barrier.wait()
+            return f"Dear {name}"
+
+        fake_client = MagicMock()
+        fake_client.chat.completions.create.return_value = _chat_response("not json")
+        candidates = [{"name": name, "resume": f"{name} resume"} for name in ["Ada", "Grace", "Alan"]]
+        with patch.object(ats_engine, "client", fake_client), patch.object(ats_engine, "get_embedding", return_value=[1.0, 0.0]), \
+                patch.object(ats_engine, "FEEDBACK_PACK_SIZE", 3), patch("ats_engine.generate_compliant_feedback", side_effect=draft):
+            drafts = ats_engine.generate_feedback_batch("Analyst", candidates)
+
+        self.assertEqual([item["feedback"] for item in drafts], ["Dear Ada", "Dear Grace", "Dear Alan"])
+
+
+class ImprovementCacheTests(unittest.TestCase):
+    def setUp(self):
+        ats_engine._improvement_cache.clear()
+
+    def test_reworded_job_description_reuses_suggestions_for_same_resume(self):
+        fake_client = MagicMock()
+        fake_client.chat.completions.create.return_value = _chat_response("1. Quantify your SQL work")
+        jd_vectors = {"SQL analyst": [1.0, 0.0], "SQL analyst.": [0.99, 0.05], "Nurse": [0.0, 1.0]}
+        with patch.object(ats_engine, "client", fake_client), \
+                patch.object(ats_engine, "get_embedding", side_effect=jd_vectors.get):
+            first = ats_engine.generate_resume_improvement_suggestions("SQL analyst", "Resume")
+            reworded = ats_engine.generate_resume_improvement_suggestions("SQL analyst.", "Resume")
+            ats_engine.generate_resume_improvement_suggestions("Nurse", "Resume")
+            ats_engine.generate_resume_improvement_suggestions("SQL analyst", "Other resume")
+
+        self.assertEqual(first, reworded)
+        self.assertEqual(fake_client.chat.completions.create.call_count, 3)
+
+    def test_streamed_suggestions_are_cached_for_the_blocking_call(self):
+        fake_client = MagicMock()
+        fake_client.chat.completions.create.return_value = iter([
+            SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))]) for text in ["1. Add ", "metrics"]
+        ])
+        with patch.object(ats_engine, "client", fake_client), patch.object(ats_engine, "get_embedding", return_value=[1.0, 0.0]):
+            streamed = list(ats_engine.stream_resume_improvement_suggestions("Analyst", "Resume"))
+            blocking = ats_engine.generate_resume_improvement_suggestions("Analyst", "Resume")
+
+        self.assertEqual(streamed, ["1. Add ", "metrics"])
+        self.assertEqual(blocking, "1. Add metrics")
+        self.assertEqual(fake_client.chat.completions.create.call_count, 1)
+
+
+class OpenAIClientTests(unittest.TestCase):
+    def test_concurrent_callers_share_one_client(self):
+        created = []
+
+        def slow_setup():
+            time.sleep(0.01)
+            created.append(object())
+            return created[-1]
+
+        with patch.object(ats_engine, "_client", None), patch.object(ats_engine, "setup_openai_client", side_effect=slow_setup):
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                clients = list(pool.map(lambda _: ats_engine.get_openai_client(), range(8)))
+
+        self.assertEqual(len(created), 1)
+        self.assertTrue(all(item is created[0] for item in clients))
+
+
+class EmbeddingQuantizationTests(unittest.TestCase):
+    def test_int8_round_trip_preserves_cosine_similarity(self):
+        rng = np.random.default_rng(7)
+        first, second = rng.normal(size=(2, 1536)).astype(np.float32)
+        restored_first = ats_cache.dequantize_embedding(ats_cache.quantize_embedding(first))
+        restored_second = ats_cache.dequantize_embedding(ats_cache.quantize_embedding(second))
+
+        def cosine(a, b):
+            return float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+        self.assertEqual(ats_cache.quantize_embedding(first)[0].dtype, np.int8)
+        self.assertAlmostEqual(cosine(restored_first, restored_second), cosine(first, second), places=2)
+
+
+class CacheStoreTests(unittest.TestCase):
+    def setUp(self):
+        _use_temporary_cache_db(self)
+
+    def test_long_text_is_stored_compressed_and_read_back_as_text(self):
+        store = ats_cache.SQLiteStore("compressed_text_test", compress_text=True)
+        resume = "EXPERIENCE\nLed payroll audits across regions.\n" * 200
+        store.set("long", resume)
+        store.set("short", "Jane Doe")
+
+        raw = store._db().execute("SELECT value FROM compressed_text_test WHERE key = 'long'").fetchone()[0]
+        self.assertIsInstance(raw, bytes)
+        self.assertLess(len(raw), len(resume) // 4)
+        self.assertEqual(store.get("long"), resume)
+        self.assertEqual(store.get("short"), "Jane Doe")
+
+
+class CosineScoreTests(unittest.TestCase):
+    def test_vectors_that_are_not_unit_length_are_normalised(self):
+        self.assertAlmostEqual(ats_engine.cosine_score([3.0, 0.0], [2.0, 2.0]), 2 ** -0.5, places=6)
+        self.assertEqual(ats_engine.cosine_score([0.0, 0.0], [1.0, 0.0]), 0.0)
+
+
+class RankingCacheTests(unittest.TestCase):
+    def setUp(self):
+        _use_temporary_cache_db(self)
+        ats_engine._embedding_cache.clear()
+
+    def test_reranking_the_same_pool_sends_nothing_to_the_api(self):
+        vectors = {"Python engineer": [1.0, 0.2, 0.0], "python": [1.0, 0.0, 0.0], "sql": [0.0, 1.0, 0.0]}
+        fake_client = MagicMock()
+        fake_client.embeddings.create.side_effect = lambda input, model: SimpleNamespace(
+            data=[SimpleNamespace(index=i, embedding=vectors[text]) for i, text in enumerate(input)]
+        )
+
+        candidates = [{"name": "a", "resume": "python"}, {"name": "b", "resume": "sql"}]
+        with patch.object(ats_engine, "client", fake_client):
+            first = ats_engine.rank_candidates("Python engineer", candidates)
+            first[0]["score"] = -1
+            second = ats_engine.rank_candidates("Python engineer ", candidates)
+
+        self.assertEqual([item["name"] for item in second], ["a", "b"])
+        self.assertGreater(second[0]["score"], 0)
+        self.assertEqual(fake_client.embeddings.create.call_count, 1)
+        self.assertEqual(fake_client.embeddings.create.call_args.kwargs["input"], ["Python engineer", "python", "sql"])
+
+    def test_near_duplicate_job_description_is_ranked_afresh(self):
+        # The two JD vectors have a cosine of about 0.94 but favour different resumes.
+        vectors = {"Python engineer": [1.0, 0.7], "Python engineer, SQL first": [0.7, 1.0], "python": [1.0, 0.0], "sql": [0.0, 1.0]}
+        candidates = [{"name": "a", "resume": "python"}, {"name": "b", "resume": "sql"}]
+        with patch.object(ats_engine, "get_embeddings", side_effect=lambda texts: [vectors[text] for text in texts]):
+            first = ats_engine.rank_candidates("Python engineer", candidates)
+            second = ats_engine.rank_candidates("Python engineer, SQL first", candidates)
+
+        self.assertGreater(ats_engine.cosine_score(vectors["Python engineer"], vectors["Python engineer, SQL first"]), 0.92)
+        self.assertEqual([item["name"] for item in first], ["a", "b"])
+        self.assertEqual([item["name"] for item in second], ["b", "a"])
+
+    def test_long_resume_scores_by_its_best_chunks_in_one_request(self):
+        # Only the window holding "python" points at the JD.
+        long_resume = "x" * 6000 + "python" + "x" * 6000
+
+        def fake_embeddings(texts):
+            return [[1.0, 0.0] if text == "Python engineer" or "python" in text else [0.0, 1.0] for text in texts]
+
+        with patch.object(ats_engine, "get_embeddings", side_effect=fake_embeddings) as embed:
+            ranked = ats_engine.rank_candidates("Python engineer", [{"name": "long", "resume": long_resume}])
+
+        sent = embed.call_args.args[0]
+        self.assertEqual(embed.call_count, 1)
+        self.assertGreater(len(sent), 2)
+        matching = sum("python" in chunk for chunk in sent[1:])
+        self.assertAlmostEqual(ranked[0]["score"], min(matching, 3) / 3, places=5)
+
+    def test_long_and_short_resumes_in_one_pool_share_the_window_scale(self):
+        long_resume = "x" * 6000 + "python" + "x" * 6000
+        short_resume = "python " * 500
+
+        def fake_embeddings(texts):
+            return [[1.0, 0.0] if text == "Python engineer" or "python" in text else [0.0, 1.0] for text in texts]
+
+        candidates = [{"name": "long", "resume": long_resume}, {"name": "short", "resume": short_resume}]
+        with patch.object(ats_engine, "get_embeddings", side_effect=fake_embeddings) as embed:
+            ranked = ats_engine.rank_candidates("Python engineer", candidates)
+
+        sent = embed.call_args.args[0][1:]
+        # The short resume is windowed too, rather than embedded whole.
+        self.assertNotIn(short_resume, sent)
+        self.assertTrue(all(len(chunk) <= ats_engine.RESUME_CHUNK_CHARS for chunk in sent))
+        long_matching = sum("python" in chunk for chunk in sent if "x" in chunk)
+        scores = {item["name"]: item["score"] for item in ranked}
+        self.assertAlmostEqual(scores["short"], 1.0, places=5)
+        self.assertAlmostEqual(scores["long"], min(long_matching, 3) / 3, places=5)
+        self.assertEqual(ranked[0]["name"], "short")
+
+
+class EmbeddingBatchTests(unittest.TestCase):
+    def setUp(self):
+        _use_temporary_cache_db(self)
+        ats_engine._embedding_cache.clear()
+
+    def test_batch_sends_only_uncached_texts_in_one_request(self):
+        fake_client = MagicMock()
+
+        def fake_create(input, model):
+            return SimpleNamespace(data=[SimpleNamespace(index=i, embedding=[float(len(text)), -1.0]) for i, text in enumerate(input)])
+
+        fake_client.embeddings.create.side_effect = fake_create
+        with patch.object(ats_engine, "client", fake_client):
+            ats_engine.get_embedding("cached resume")
+            vectors = ats_engine.get_embeddings(["cached resume", "", "new resume"])
+
+        self.assertEqual(vectors[1], None)
+        np.testing.assert_allclose(vectors[0], np.array([13.0, -1.0]) / np.hypot(13.0, 1.0), rtol=0.05)
+        np.testing.assert_allclose(vectors[2], np.array([10.0, -1.0]) / np.hypot(10.0, 1.0), rtol=0.05)
+        self.assertAlmostEqual(float(np.linalg.norm(vectors[2])), 1.0, places=5)
+        self.assertEqual(fake_client.embeddings.create.call_count, 2)
+        self.assertEqual(fake_client.embeddings.create.call_args.kwargs["input"], ["new resume"])
+
+    def test_inputs_are_truncated_by_tokens_when_a_tokenizer_is_available(self):
+        encoding = SimpleNamespace(encode=lambda text, disallowed_special: text.split(), decode=" ".join)
+        with patch.object(ats_engine, "_embedding_encoding", return_value=encoding), \
+                patch.object(ats_engine, "EMBEDDING_MAX_TOKENS", 3):
+            self.assertEqual(ats_engine._prepare_embedding_input("one two\nthree four"), "one two three")
+            self.assertEqual(ats_engine._prepare_embedding_input("one two"), "one two")
+
+    def test_short_inputs_are_not_tokenised(self):
+        encoding = MagicMock()
+        with patch.object(ats_engine, "_embedding_encoding", return_value=encoding):
+            self.assertEqual(ats_engine._prepare_embedding_input("x" * 2000), "x" * 2000)
+
+        encoding.encode.assert_not_called()
+
+    def test_large_batches_are_split_at_the_request_limit(self):
+        fake_client = MagicMock()
+
+        def fake_create(input, model):
+            return SimpleNamespace(data=[SimpleNamespace(index=i, embedding=[float(len(text)), 1.0]) for i, text in enumerate(input)])
+
+        fake_client.embeddings.create.side_effect = fake_create
+        with patch.object(ats_engine, "client", fake_client), patch.object(ats_engine, "EMBEDDING_BATCH_SIZE", 2):
+            vectors = ats_engine.get_embeddings(["a", "bb", "ccc"])
+
+        self.assertEqual(fake_client.embeddings.create.call_count, 2)
+        np.testing.assert_allclose([vector[0] / vector[1] for vector in vectors], [1.0, 2.0, 3.0], rtol=0.05)
+
+    def test_batch_api_results_are_cached_for_ranking(self):
+        fake_client = MagicMock()
+        fake_client.batches.create.return_value = SimpleNamespace(id="batch_1", status="validating")
+        with patch.object(ats_engine, "client", fake_client):
+            queued = ats_engine.submit_embedding_batch(["JD", "resume", "resume"])
+            uploaded = fake_client.files.create.call_args.kwargs["file"][1].decode().splitlines()
+            output = "\n".join(
+                json.dumps({"custom_id": json.loads(line)["custom_id"], "response": {"status_code": 200, "body": {"data": [{"embedding": [0.6, 0.8]}]}}})
+                for line in uploaded
+            )
+            fake_client.batches.retrieve.return_value = SimpleNamespace(status="completed", output_file_id="file_out")
+            fake_client.files.content.return_value = SimpleNamespace(text=output)
+            collected = ats_engine.collect_embedding_batch("batch_1")
+            vectors = ats_engine.get_embeddings(["JD", "resume"])
+
+        self.assertEqual(queued["submitted"], 2)
+        self.assertEqual(collected["stored"], 2)
+        np.testing.assert_allclose(vectors[1], [0.6, 0.8], rtol=0.02)
+        fake_client.embeddings.create.assert_not_called()
+
+    def test_duplicate_texts_are_embedded_once(self):
+        fake_client = MagicMock()
+        fake_client.embeddings.create.return_value = SimpleNamespace(data=[SimpleNamespace(index=0, embedding=[0.5, 0.5])])
+        with patch.object(ats_engine, "client", fake_client):
+            vectors = ats_engine.get_embeddings(["same resume", "same resume"])
+
+        self.assertEqual(vectors[0], vectors[1])
+        self.assertIsNot(vectors[0], vectors[1])
+        self.assertEqual(fake_client.embeddings.create.call_args.kwargs["input"], ["same resume"])
+
+    def test_whitespace_only_edits_reuse_the_cached_vector(self):
+        fake_client = MagicMock()
+        fake_client.embeddings.create.return_value = SimpleNamespace(data=[SimpleNamespace(index=0, embedding=[0.5, 0.5])])
+        with patch.object(ats_engine, "client", fake_client):
+            first = ats_engine.get_embedding("Senior  analyst\nSQL")
+            again = ats_engine.get_embedding("Senior analyst SQL \n")
+
+        self.assertEqual(first, again)
+        self.assertEqual(fake_client.embeddings.create.call_count, 1)
+
+    def test_embeddings_survive_losing_the_memory_cache(self):
+        fake_client = MagicMock()
+        fake_client.embeddings.create.return_value = SimpleNamespace(data=[SimpleNamespace(index=0, embedding=[0.25, -0.5])])
+        with patch.object(ats_engine, "client", fake_client):
+            stored = ats_engine.get_embedding("persisted resume")
+            restarted = ats_cache.ResponseCache(store=ats_engine._embedding_cache.store)
+            with patch.object(ats_engine, "_embedding_cache", restarted):
+                restored = ats_engine.get_embedding("persisted resume")
+
+        self.assertEqual(restored, stored)
+        self.assertEqual(fake_client.embeddings.create.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
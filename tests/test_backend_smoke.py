@@ -1,5 +1,6 @@
 """Smoke tests for the additive FastAPI backend."""
 
+import io
 import unittest
 import json
 import tempfile
@@ -79,6 +80,74 @@ class BackendSmokeTests(unittest.TestCase):
         self.assertNotIn("react", analysis["requirements"])
         self.assertTrue(all(item["requirement"].lower() in analysis["missing_requirements"] for item in analysis["suggestions"]))
 
+    def test_batch_match_blends_semantic_and_evidence_scores(self):
+        ranked = [
+            {"name": "strong", "score": 0.9, "resume": "Python and SQL engineer"},
+            {"name": "weak", "score": 0.95, "resume": "Gardener"},
+        ]
+        with patch("services.ats_service.rank_candidates", return_value=ranked):
+            response = self.client.post(
+                "/api/matching/batch",
+                json={"job_description": "Engineer required with python and sql experience.", "candidates": [{"name": "strong", "resume": "x"}, {"name": "weak", "resume": "y"}]},
+            )
+
+        self.assertEqual(response.status_code, 200)
+        candidates = response.json()["candidates"]
+        self.assertEqual([item["name"] for item in candidates], ["strong", "weak"])
+        self.assertEqual(candidates[1]["semantic_score"], 0.95)
+        self.assertIn("python", candidates[0]["matched_requirements"])
+
+    def test_large_pools_only_embed_resumes_with_the_most_evidence(self):
+        candidates = [{"name": f"strong-{index}", "resume": f"Python and SQL engineer {index}"} for index in range(20)]
+        candidates += [{"name": f"weak-{index}", "resume": f"Gardener {index}"} for index in range(40)]
+
+        def fake_rank(job_description, pool):
+            return [{**candidate, "score": 0.5} for candidate in pool]
+
+        with patch("services.ats_service.rank_candidates", side_effect=fake_rank) as rank:
+            response = self.client.post(
+                "/api/matching/batch",
+                json={"job_description": "Engineer required with python and sql experience.", "candidates": candidates},
+            )
+
+        self.assertEqual(response.status_code, 200)
+        ranked = response.json()["candidates"]
+        embedded = rank.call_args.args[1]
+        self.assertEqual(len(embedded), 20)
+        self.assertTrue(all(candidate["name"].startswith("strong") for candidate in embedded))
+        self.assertEqual(len(ranked), 60)
+        self.assertEqual(sum(1 for candidate in ranked if candidate.get("prefiltered")), 40)
+
+    def test_large_pool_returns_every_resume_by_evidence_when_ranking_is_empty(self):
+        candidates = [{"name": f"strong-{index}", "resume": f"Python and SQL engineer {index}"} for index in range(20)]
+        candidates += [{"name": f"weak-{index}", "resume": f"Gardener {index}"} for index in range(40)]
+        with patch("services.ats_service.rank_candidates", return_value=[]):
+            response = self.client.post(
+                "/api/matching/batch",
+                json={"job_description": "Engineer required with python and sql experience.", "candidates": candidates},
+            )
+
+        self.assertEqual(response.status_code, 200)
+        ranked = response.json()["candidates"]
+        self.assertEqual(len(ranked), 60)
+        self.assertTrue(all(candidate["semantic_score"] == 0.0 for candidate in ranked))
+        self.assertTrue(all(candidate["name"].startswith("strong") for candidate in ranked[:20]))
+        self.assertTrue(all(candidate["name"].startswith("weak") and candidate["prefiltered"] for candidate in ranked[20:]))
+
+    def test_queued_batch_embeddings_skip_prefiltered_resumes(self):
+        candidates = [{"name": f"strong-{index}", "resume": f"Python and SQL engineer {index}"} for index in range(20)]
+        candidates += [{"name": f"weak-{index}", "resume": f"Gardener {index}"} for index in range(40)]
+        with patch("services.ats_service.submit_embedding_batch", return_value={"batch_id": "batch_1", "status": "validating", "submitted": 21}) as submit:
+            response = self.client.post(
+                "/api/matching/batch/embeddings",
+                json={"job_description": "Engineer required with python and sql experience.", "candidates": candidates},
+            )
+
+        self.assertEqual(response.status_code, 200)
+        queued = submit.call_args.args[0]
+        self.assertEqual(len(queued), 21)
+        self.assertFalse(any(text.startswith("Gardener") for text in queued))
+
     def test_feedback_signature_uses_recruiter_profile(self):
         with patch("backend.routes.matching.generate_candidate_feedback", return_value="Regards,\n[Your Name]\n[Your Job Title]"):
             response = self.client.post(
@@ -96,12 +165,87 @@ class BackendSmokeTests(unittest.TestCase):
         self.assertIn("Talent Lead", response.json()["feedback"])
         self.assertNotIn("[Your", response.json()["feedback"])
 
+    def test_streamed_feedback_fills_placeholders_split_across_chunks(self):
+        chunks = iter(["Regards,\n[Your ", "Name]\n[Your Job", " Title]"])
+        with patch("backend.routes.matching.stream_candidate_feedback", return_value=chunks):
+            response = self.client.post(
+                "/api/matching/feedback/stream",
+                json={
+                    "job_description": "HR Advisor",
+                    "candidate_resume": "HR experience",
+                    "recruiter_name": "Alex Morgan",
+                    "recruiter_job_title": "Talent Lead",
+                },
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.text, "Regards,\nAlex Morgan\nTalent Lead")
+
+    def test_batch_feedback_keeps_candidate_order_and_fills_signature(self):
+        drafts = [{"feedback": "To Ada\n[Your Name]"}, {"feedback": "To Grace\n[Your Name]"}]
+        with patch("backend.routes.matching.generate_candidate_feedback_batch", return_value=drafts) as generate:
+            response = self.client.post(
+                "/api/matching/feedback/batch",
+                json={
+                    "job_description": "HR Advisor",
+                    "candidates": [{"name": "ada.pdf", "resume": "HR", "candidate_name": "Ada"}, {"name": "Grace", "resume": "HR"}],
+                    "recruiter_name": "Alex Morgan",
+                },
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["feedback"],
+            [{"feedback": "To Ada\nAlex Morgan", "name": "ada.pdf"}, {"feedback": "To Grace\nAlex Morgan", "name": "Grace"}],
+        )
+        self.assertEqual([candidate["name"] for candidate in generate.call_args.args[1]], ["Ada", "Grace"])
+
+    def test_improvements_skip_the_llm_when_no_requirement_overlaps(self):
+        payload = {"job_description": "Requirements: SQL, Python and Power BI reporting", "candidate_resume": "Pastry chef, wedding cakes"}
+        with patch("services.ats_service.generate_resume_improvement_suggestions", return_value="AI suggestions") as generate:
+            local = self.client.post("/api/matching/improvements", json=payload)
+            forced = self.client.post("/api/matching/improvements", json={**payload, "force": True})
+        self.assertTrue(local.json()["improvements"].startswith("Very low keyword overlap"))
+        self.assertEqual(forced.json()["improvements"], "AI suggestions")
+        self.assertEqual(generate.call_count, 1)
+
     def test_email_delivery_route_uses_provider_result(self):
         with patch("backend.routes.communications.send_recruiter_email", return_value={"success": True, "status": "delivered", "provider_status": 202, "message_id": "test-message"}):
             response = self.client.post("/api/communications/email/send", json={"recruiter_email": "recruiter@example.com", "to_email": "candidate@example.com", "subject": "Application update", "body": "Thank you"})
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json()["message_id"], "test-message")
 
+    def test_batch_resume_extraction_preserves_upload_order(self):
+        files = [("files", (f"{name}.pdf", _pdf_bytes(f"{name} resume text"), "application/pdf")) for name in ["first", "second", "third"]]
+        with tempfile.TemporaryDirectory() as temp_dir, patch("ats_cache.CACHE_DB_FILE", str(Path(temp_dir) / "cache.sqlite3")):
+            response = self.client.post("/api/matching/resume/extract/batch", files=files)
+
+        self.assertEqual(response.status_code, 200)
+        resumes = response.json()["resumes"]
+        self.assertEqual([item["filename"] for item in resumes], ["first.pdf", "second.pdf", "third.pdf"])
+        self.assertIn("second resume text", resumes[1]["text"])
+
+    def test_batch_resume_extraction_can_clean_in_the_same_request(self):
+        files = [("files", (f"{name}.pdf", _pdf_bytes(f"{name} resume text"), "application/pdf")) for name in ["first", "second"]]
+        with tempfile.TemporaryDirectory() as temp_dir, patch("ats_cache.CACHE_DB_FILE", str(Path(temp_dir) / "cache.sqlite3")), \
+                patch("services.ats_service.clean_resumes", return_value=["[SUMMARY] First", "Error: No content returned from cleaning"]) as clean:
+            response = self.client.post("/api/matching/resume/extract/batch?clean=true", files=files)
+
+        self.assertEqual(response.status_code, 200)
+        resumes = response.json()["resumes"]
+        self.assertEqual(clean.call_count, 1)
+        self.assertEqual(resumes[0]["cleaned_text"], "[SUMMARY] First")
+        self.assertIn("clean_error", resumes[1])
+        self.assertIn("second resume text", resumes[1]["text"])
+
+
+def _pdf_bytes(text):
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer)
+    pdf.drawString(72, 720, text)
+    pdf.save()
+    return buffer.getvalue()
+
 
 class SecurityFlowTests(unittest.TestCase):
     def setUp(self):
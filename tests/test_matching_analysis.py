@@ -0,0 +1,29 @@
+"""Unit tests for deterministic requirement matching."""
+
+import unittest
+
+from services.matching_analysis import analyse_role_fit, extract_job_requirements
+
+
+class RequirementMatchingTests(unittest.TestCase):
+    def test_overlapping_known_terms_are_all_found(self):
+        requirements = extract_job_requirements("We need content marketing strategy and SQL.")
+
+        self.assertIn("content marketing", requirements)
+        self.assertIn("marketing strategy", requirements)
+        self.assertIn("sql", requirements)
+
+    def test_requirements_match_whole_words_only(self):
+        result = analyse_role_fit("", "Built reactive dashboards in MySQL and data pipelines", ["react", "sql", "data", "data analysis"])
+
+        self.assertEqual(result["matched_requirements"], ["data"])
+        self.assertEqual(result["missing_requirements"], ["react", "sql", "data analysis"])
+
+    def test_term_that_prefixes_another_is_still_matched(self):
+        result = analyse_role_fit("", "Five years of data analysis", ["data", "data analysis"])
+
+        self.assertEqual(result["matched_requirements"], ["data", "data analysis"])
+
+
+if __name__ == "__main__":
+    unittest.main()